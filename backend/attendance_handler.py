@@ -3,11 +3,15 @@ import csv
 import pandas as pd
 import datetime
 import time
+from backend.attendance_journal import AttendanceJournal, JOURNAL_SUFFIX, read_journal
+from backend.trace_recorder import trace_span
 
 class AttendanceHandler:
     def __init__(self, attendance_path, student_details_path):
         self.attendance_path = attendance_path
         self.student_details_path = student_details_path
+        # Optional TraceRecorder for file writes
+        self.tracer = None
         # Ensure base attendance directory exists
         os.makedirs(self.attendance_path, exist_ok=True)
 
@@ -81,31 +85,167 @@ class AttendanceHandler:
             print(f"Error creating attendance record: {str(e)}")
             return None
     
+    def _session_filepath(self, subject, ts=None, index=0):
+        """
+        Path of a session CSV for `subject` stamped with `ts` (default now)
+        index > 0 adds a suffix telling apart sessions started in the same second
+        """
+        if ts is None:
+            ts = time.time()
+        date = datetime.datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
+        time_stamp = datetime.datetime.fromtimestamp(ts).strftime("%H:%M:%S")
+        hour, minute, second = time_stamp.split(":")
+        
+        subject_path = os.path.join(self.attendance_path, subject)
+        os.makedirs(subject_path, exist_ok=True)
+        
+        suffix = f"_{index}" if index else ""
+        filename = f"{subject}_{date}_{hour}-{minute}-{second}{suffix}.csv"
+        return os.path.join(subject_path, filename)
+    
+    def _create_session_file(self, subject, create):
+        """
+        Start a new session file without taking over another session's name
+        `create(filepath)` must create its file exclusively (mode "x"); names
+        used by a session CSV or journal are skipped, so sessions started in
+        the same second (another camera, or one that ended early) get
+        suffixed names instead of overwriting each other.
+        Returns: what `create` returns
+        """
+        ts = time.time()
+        for index in range(1000):
+            filepath = self._session_filepath(subject, ts, index)
+            # Journal first: finalizing renames it to the CSV
+            if os.path.exists(filepath + JOURNAL_SUFFIX) or os.path.exists(filepath):
+                continue
+            try:
+                return create(filepath)
+            except FileExistsError:
+                continue
+        raise FileExistsError(f"No free session file name for {subject}")
+    
     def save_attendance(self, attendance_data, subject):
         """Save attendance to CSV"""
         try:
-            ts = time.time()
-            date = datetime.datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
-            time_stamp = datetime.datetime.fromtimestamp(ts).strftime("%H:%M:%S")
-            hour, minute, second = time_stamp.split(":")
-            
-            subject_path = os.path.join(self.attendance_path, subject)
-            os.makedirs(subject_path, exist_ok=True)
-            
-            filename = f"{subject}_{date}_{hour}-{minute}-{second}.csv"
-            filepath = os.path.join(subject_path, filename)
-            
-            df = pd.DataFrame(attendance_data)
-            df = df.drop_duplicates(["Enrollment"], keep="first")
-            df.to_csv(filepath, index=False)
+            with trace_span(self.tracer, "save_attendance", "io", {"records": len(attendance_data)}):
+                df = pd.DataFrame(attendance_data)
+                df = df.drop_duplicates(["Enrollment"], keep="first")
+                
+                def write(filepath):
+                    with open(filepath, "x", newline="") as f:
+                        df.to_csv(f, index=False)
+                    return filepath
+                
+                filepath = self._create_session_file(subject, write)
             
             # After saving a session file, update subject summary
-            self.calculate_attendance(subject)
+            with trace_span(self.tracer, "update_summary", "io"):
+                self.update_summary(subject, filepath)
 
             return filepath, f"Attendance saved successfully for {subject}"
         except Exception as e:
             return None, f"Error saving attendance: {str(e)}"
     
+    # -------------------- Session Journal --------------------
+    def open_journal(self, subject, durable=False):
+        """Start a crash-safe journal for a new session. Returns AttendanceJournal or None"""
+        try:
+            return self._create_session_file(
+                subject, lambda filepath: AttendanceJournal(filepath, durable=durable).open()
+            )
+        except Exception as e:
+            print(f"Error opening attendance journal: {str(e)}")
+            return None
+    
+    def finalize_journal(self, journal, subject):
+        """Turn a session journal into the session CSV and update the subject summary"""
+        try:
+            if journal.count == 0:
+                journal.discard()
+                return None, "No attendance recorded"
+            
+            with trace_span(self.tracer, "finalize_journal", "io", {"records": journal.count}):
+                filepath = journal.finalize()
+            with trace_span(self.tracer, "update_summary", "io"):
+                self.update_summary(subject, filepath)
+            return filepath, f"Attendance saved successfully for {subject}"
+        except Exception as e:
+            return None, f"Error saving attendance: {str(e)}"
+    
+    def recover_journals(self):
+        """
+        Finalize journals left behind by interrupted sessions
+        Returns: list of recovered session CSV paths
+        """
+        recovered = []
+        try:
+            for subject in os.listdir(self.attendance_path):
+                subject_path = os.path.join(self.attendance_path, subject)
+                if not os.path.isdir(subject_path):
+                    continue
+                
+                for name in os.listdir(subject_path):
+                    if not name.endswith(".csv" + JOURNAL_SUFFIX):
+                        continue
+                    journal_path = os.path.join(subject_path, name)
+                    try:
+                        records = read_journal(journal_path)
+                        if not records:
+                            os.remove(journal_path)
+                            continue
+                        
+                        filepath = journal_path[:-len(JOURNAL_SUFFIX)]
+                        pd.DataFrame(records).to_csv(filepath, index=False)
+                        os.remove(journal_path)
+                        self.update_summary(subject, filepath)
+                        recovered.append(filepath)
+                        print(f"✓ Recovered interrupted session: {filepath} ({len(records)} students)")
+                    except Exception as e:
+                        print(f"Error recovering journal {name}: {str(e)}")
+        except Exception as e:
+            print(f"Error recovering journals: {str(e)}")
+        return recovered
+    
+    def update_summary(self, subject, session_file):
+        """
+        Add one new session file to the subject summary without re-reading
+        historical sessions. Falls back to calculate_attendance when the
+        summary does not match the session files on disk.
+        """
+        try:
+            attendance_files, _ = self.get_attendance_records(subject)
+            total_sessions = len(attendance_files)
+            summary_file = os.path.join(self.attendance_path, subject, "attendance.csv")
+            
+            if not os.path.exists(summary_file):
+                return self.calculate_attendance(subject)
+            summary = pd.read_csv(summary_file)
+            previous_total = int(summary["TotalSessions"].max()) if len(summary) > 0 else 0
+            if previous_total != total_sessions - 1:
+                return self.calculate_attendance(subject)
+            
+            session = pd.read_csv(session_file)
+            if not {"Enrollment", "Name"}.issubset(session.columns):
+                return self.calculate_attendance(subject)
+            session = session[["Enrollment", "Name"]].drop_duplicates(["Enrollment"])
+            session["PresentCount"] = 1
+            
+            combined = pd.concat([summary[["Enrollment", "Name", "PresentCount"]], session], ignore_index=True)
+            combined["Enrollment"] = combined["Enrollment"].astype(str)
+            combined["Name"] = combined["Name"].astype(str)
+            agg = combined.groupby(["Enrollment", "Name"], as_index=False).agg({"PresentCount": "sum"})
+            
+            agg["TotalSessions"] = total_sessions
+            agg["PresentCount"] = agg["PresentCount"].astype(int)
+            # Same column order as calculate_attendance
+            agg = agg[["Enrollment", "Name", "TotalSessions", "PresentCount"]]
+            agg["Attendance"] = (agg["PresentCount"] / agg["TotalSessions"] * 100).round().astype(int).astype(str) + "%"
+            agg.to_csv(summary_file, index=False)
+            
+            return agg, "Attendance summary updated"
+        except Exception as e:
+            return None, f"Error updating attendance summary: {str(e)}"
+    
     def get_attendance_records(self, subject):
         """Get all attendance records for a subject"""
         try:
@@ -127,6 +267,10 @@ class AttendanceHandler:
     
     def calculate_attendance(self, subject):
         """Calculate attendance percentage"""
+        with trace_span(self.tracer, "calculate_attendance", "io"):
+            return self._calculate_attendance(subject)
+    
+    def _calculate_attendance(self, subject):
         try:
             attendance_files, msg = self.get_attendance_records(subject)
 
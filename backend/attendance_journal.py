@@ -0,0 +1,83 @@
+import csv
+import os
+
+JOURNAL_SUFFIX = ".journal"
+JOURNAL_FIELDS = ["Enrollment", "Name", "Date", "Time"]
+
+
+class AttendanceJournal:
+    """
+    Append-only CSV journal of one attendance session.
+
+    Every recognition is appended and flushed as it happens, so a crash
+    loses nothing. The journal lives next to the session CSV as
+    `<session>.csv.journal`; finalizing renames it to the session CSV.
+    """
+
+    def __init__(self, filepath, durable=False):
+        # filepath is the final session CSV path
+        self.filepath = filepath
+        self.journal_path = filepath + JOURNAL_SUFFIX
+        # fsync after every record (survives power loss, costs a disk sync per student)
+        self.durable = durable
+        self.file = None
+        self.writer = None
+        self.count = 0
+
+    def open(self):
+        """Create the journal; raises FileExistsError if another session owns it"""
+        os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+        self.file = open(self.journal_path, "x", newline="")
+        self.writer = csv.DictWriter(self.file, fieldnames=JOURNAL_FIELDS, extrasaction="ignore")
+        self.writer.writeheader()
+        self._flush()
+        return self
+
+    def append(self, record):
+        """Append one attendance record and flush it to the OS"""
+        if self.writer is None:
+            return
+        self.writer.writerow(record)
+        self.count += 1
+        self._flush()
+
+    def _flush(self):
+        self.file.flush()
+        if self.durable:
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            self.writer = None
+
+    def finalize(self):
+        """Close and atomically turn the journal into the session CSV. Returns the CSV path"""
+        self.close()
+        os.replace(self.journal_path, self.filepath)
+        return self.filepath
+
+    def discard(self):
+        """Close and delete the journal (session recorded nobody)"""
+        self.close()
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+
+def read_journal(journal_path):
+    """
+    Read the records of a journal, skipping a torn last line.
+    Returns: list of record dicts, first occurrence per Enrollment
+    """
+    records = []
+    seen = set()
+    with open(journal_path, newline="") as f:
+        for row in csv.DictReader(f):
+            if any(not row.get(field) for field in JOURNAL_FIELDS):
+                continue
+            if row["Enrollment"] in seen:
+                continue
+            seen.add(row["Enrollment"])
+            records.append({field: row[field] for field in JOURNAL_FIELDS})
+    return records
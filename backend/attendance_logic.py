@@ -1,133 +1,360 @@
 import cv2
-import pandas as pd
 import time
-import datetime
 import os
 from backend.face_recognition import FaceRecognizer
 from backend.attendance_handler import AttendanceHandler
 from backend.student_manager import StudentManager
+from backend.attendance_session import AttendanceSession
+from backend.frame_capture import FrameGrabber
+from backend.roster_index import RosterIndex
+from backend.keyframe_detector import KeyframeDetector
+from backend.recognition_pool import RecognitionPool
+from backend.video_attendance import VideoAttendanceProcessor
+from backend.session_manager import MultiCameraSessionManager
+from backend.stage_timer import StageTimer, NULL_TIMER, timings_path_for
+from backend.trace_recorder import TraceRecorder, trace_span, trace_path_for
+from backend.model_cache import MODEL_CACHE
+from backend.model_watcher import ModelWatcher
+from backend.utils import TextToSpeech
 
 class AttendanceLogic:
-    def __init__(self, base_dir, haarcascade_path, train_path, student_details_path, model_path):
+    def __init__(self, base_dir, haarcascade_path, train_path, student_details_path, model_path,
+                 recognizer_backend="cv2"):
         self.base_dir = base_dir
         self.haarcascade_path = haarcascade_path
         self.train_path = train_path
         self.student_details_path = student_details_path
         self.model_path = model_path
         
-        self.face_recognizer = FaceRecognizer(haarcascade_path, model_path)
+        # "numpy" predicts each frame's crops in one vectorized batch (see NumpyLBPHRecognizer),
+        # "pca" does the same in a compressed feature space (see CompressedLBPHRecognizer)
+        self.face_recognizer = FaceRecognizer(haarcascade_path, model_path, backend=recognizer_backend)
         self.attendance_handler = AttendanceHandler(os.path.join(base_dir, "Attendance"), student_details_path)
         self.student_manager = StudentManager(student_details_path)
+        self.roster_index = RosterIndex(student_details_path)
+
+        # Statistics of the most recent session (frames captured/processed/dropped, latency)
+        self.last_session_stats = {}
+        # [(enrollment, name)] of enrolled students not seen in the most recent session
+        self.last_absentees = []
+        # Per-stage timing percentiles of the most recent session
+        self.last_stage_timings = {}
+        # (TraceRecorder, trace path) of the most recent session when it was traced
+        self.last_trace = None
     
-    def start_attendance(self, subject):
+    def start_attendance(self, subject, camera_index=0, buffer_size=2, keyframe_interval=1, min_track_ratio=0.5,
+                         detection_scale=1.0, recognition_workers=0, headless=False, duration=20,
+                         stop_event=None, governor=None, use_subject_model=True, fallback_to_global=True,
+                         motion_gate=None, trace=False, on_frame=None, on_recognized=None,
+                         preview_interval=0.1, watch_model=True, prune_top_k=None):
         """
         Start attendance process
+        Frames are captured on a background thread into a ring buffer of
+        `buffer_size` frames; the loop below always processes the newest one.
+        With keyframe_interval > 1 the cascade only runs every N frames (or when
+        fewer than min_track_ratio of the optical-flow points survive) and face
+        boxes are propagated with optical flow in between.
+        detection_scale < 1 runs the cascade on a downscaled frame while faces
+        are still recognized from full-resolution crops.
+        recognition_workers > 0 predicts crowded frames in a process pool (cv2
+        backend only; the numpy and pca backends already batch in-process).
+        headless=True skips all drawing and HighGUI windows; the session then
+        ends after `duration` seconds or when `stop_event` (threading.Event) is set.
+        governor (CpuGovernor) adapts keyframe interval, detection scale and
+        frame skip during the session to stay inside its CPU/latency budget.
+        The session ends early once every student enrolled in the subject has
+        been recognized; the remaining students are kept in self.last_absentees.
+        use_subject_model loads only the subject's model shard; when the shard is
+        missing or stale the global model is used unless fallback_to_global is False.
+        motion_gate (MotionGate) skips detection and recognition on frames where
+        nothing changed while every visible face already has an identity.
+        Per-stage timings are always collected and saved as <session>_timings.json.
+        trace=True also writes a Chrome trace-event timeline as <session>_trace.json.
+        on_frame(frame) receives an annotated preview frame at most every
+        preview_interval seconds and on_recognized(record) each new student;
+        both are called on the session thread, so GUI callers should only queue.
+        The preview frame is a recycled capture buffer: copy it before keeping it.
+        watch_model=True reloads the model and roster in the background when a
+        student is registered mid-session and swaps them in between frames.
+        prune_top_k (numpy backend) matches crops against student centroids first
+        and exactly only against the samples of the k nearest students.
         Returns: (success, student_count, message)
         """
+        grabber = None
+        pool = None
+        journal = None
+        watcher = None
+        tracer = TraceRecorder() if trace else None
+        timer = StageTimer(tracer)
+        self.last_trace = None
         try:
+            # Load student details (rebuilt only if the registry changed)
+            self.roster_index.refresh()
+            
+            if len(self.roster_index) == 0:
+                return False, 0, "No students registered!"
+            
             # Load model
-            if not self.face_recognizer.load_model():
+            with trace_span(tracer, "load_model", "recognizer"):
+                model_loaded = self.face_recognizer.load_model(
+                    subject if use_subject_model else None,
+                    expected_labels=self.roster_index.expected_for_subject(subject),
+                    fallback_to_global=fallback_to_global
+                )
+            if not model_loaded:
                 return False, 0, "Model not found! Train first."
             
-            # Load student details
-            df = pd.read_csv(self.student_details_path)
-            
-            if len(df) == 0:
-                return False, 0, "No students registered!"
+            self.face_recognizer.detection_scale = detection_scale
+            self.face_recognizer.prune_top_k = prune_top_k
             
             # Start camera
-            cam = cv2.VideoCapture(0)
-            if not cam.isOpened():
+            grabber = FrameGrabber(camera_index, buffer_size=buffer_size, timer=timer)
+            if not grabber.start():
                 return False, 0, "Camera not found!"
             
-            font_cv = cv2.FONT_HERSHEY_SIMPLEX
-            attendance_records = []
-            recognized_students = set()
+            if recognition_workers > 0 and self.face_recognizer.backend == "cv2":
+                model_file = self.face_recognizer.loaded_model_path
+                pool = RecognitionPool(model_file, recognition_workers,
+                                       segments=self.face_recognizer.segment_files(model_file))
+                if pool.start():
+                    self.face_recognizer.recognition_pool = pool
+                else:
+                    pool = None
+            
+            self.face_recognizer.timer = timer
+            self.attendance_handler.tracer = tracer
+            
+            detector = None
+            if keyframe_interval > 1 or governor is not None:
+                detector = KeyframeDetector(self.face_recognizer, keyframe_interval, min_track_ratio)
+            
+            if governor is not None:
+                # Governor starts from the requested settings and adjusts from there
+                governor.keyframe_interval = max(1, keyframe_interval)
+                governor.detection_scale = detection_scale
+                governor.apply(self.face_recognizer, detector)
+            
+            if watch_model:
+                watcher = ModelWatcher(self.face_recognizer, self.roster_index)
+                watcher.start()
+            
+            # Every recognition is appended to a crash-safe journal as it happens
+            journal = self.attendance_handler.open_journal(subject)
+            
+            session = AttendanceSession(
+                self.face_recognizer, self.attendance_handler, self.roster_index, subject,
+                detector=detector, motion_gate=motion_gate, journal=journal,
+                on_recognized=on_recognized
+            )
             
             start_time = time.time()
-            duration = 20  # 20 seconds
+            display_time = 0.0
+            last_preview = 0.0
             
             while True:
-                ret, frame = cam.read()
-                if not ret:
+                if stop_event is not None and stop_event.is_set():
                     break
                 
-                faces, gray = self.face_recognizer.get_faces_from_image(frame)
+                frame, captured_at = grabber.read_latest()
+                if frame is None:
+                    if not grabber.running:
+                        break
+                    if time.time() - start_time >= duration:
+                        break
+                    continue
                 
-                for (x, y, w, h) in faces:
-                    # Use improved recognition method
-                    student_id, confidence, is_recognized = self.face_recognizer.recognize_face(
-                        gray[y:y + h, x:x + w],
-                        confidence_threshold=70
-                    )
-                    
-                    if is_recognized and student_id is not None:
-                        # Match by normalized ID: remove dash and compare as int
-                        try:
-                            normalized_ids = df["Enrollment"].astype(str).str.replace("-", "", regex=False).astype(int)
-                            matches = normalized_ids == int(student_id)
-                            student = df[matches]
-                        except Exception:
-                            student = pd.DataFrame()
-                        
-                        if len(student) > 0:
-                            name = student["Name"].values[0]
-                            
-                            # Only record once per student
-                            if student_id not in recognized_students:
-                                ts = time.time()
-                                date = datetime.datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
-                                time_str = datetime.datetime.fromtimestamp(ts).strftime("%H:%M:%S")
-                                
-                                record = self.attendance_handler.create_attendance_record(
-                                    student_id, name, subject, date, time_str
-                                )
-                                if record:
-                                    attendance_records.append(record)
-                                    recognized_students.add(student_id)
-                                    print(f"✓ Recognized: {name} (ID: {student_id}, Confidence: {confidence:.2f})")
-                            
-                            # Draw rectangle and name (Green = Recognized)
-                            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 260, 0), 4)
-                            cv2.putText(frame, f"{student_id}-{name}", (x + h, y), font_cv, 1, (255, 255, 0), 4)
-                            cv2.putText(frame, f"Conf: {confidence:.1f}%", (x, y + h + 20), 
-                                      font_cv, 0.6, (255, 255, 0), 2)
-                        else:
-                            # Unknown student
-                            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 25, 255), 7)
-                            cv2.putText(frame, "Unknown Student", (x + h, y), font_cv, 1, (0, 25, 255), 4)
-                    else:
-                        # Face detected but not recognized (Orange = Low confidence)
-                        cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 165, 255), 2)
-                        cv2.putText(frame, "Not Recognized", (x + h, y), font_cv, 0.7, (0, 165, 255), 2)
-                        if confidence:
-                            cv2.putText(frame, f"Conf: {confidence:.1f}%", (x, y + h + 20), 
-                                      font_cv, 0.6, (0, 165, 255), 2)
+                if governor is not None and not governor.should_process():
+                    continue
+                
+                if watcher is not None:
+                    # Swap in a model retrained since the last frame (reference swap only)
+                    watcher.apply_pending(session)
+                
+                frame_started = time.perf_counter()
+                with timer.stage("frame"):
+                    detections = session.process_frame(frame, captured_at)
+                if governor is not None and governor.observe(time.perf_counter() - frame_started):
+                    governor.apply(self.face_recognizer, detector)
                 
-                # Display timer and student count
                 elapsed = int(time.time() - start_time)
                 remaining = duration - elapsed
-                cv2.putText(frame, f"Time: {remaining}s | Students: {len(recognized_students)}", 
-                          (10, 30), font_cv, 1, (255, 255, 0), 2)
                 
-                cv2.imshow("Taking Attendance... (Press ESC to stop early)", frame)
+                if not headless:
+                    display_started = time.perf_counter()
+                    with timer.stage("draw"):
+                        # Display timer and student count
+                        session.draw_detections(frame, detections, remaining)
+                    with timer.stage("display"):
+                        cv2.imshow("Taking Attendance... (Press ESC to stop early)", frame)
+                        key = cv2.waitKey(1) & 0xFF
+                    display_time += time.perf_counter() - display_started
+                    
+                    if key == 27:  # ESC key
+                        break
+                
+                if on_frame is not None and time.perf_counter() - last_preview >= preview_interval:
+                    last_preview = time.perf_counter()
+                    with timer.stage("preview"):
+                        if headless:
+                            session.draw_detections(frame, detections, remaining)
+                        on_frame(frame)
                 
                 if remaining <= 0:
                     break
                 
-                if cv2.waitKey(30) & 0xFF == 27:  # ESC key
+                if session.roster_complete:
+                    print("✓ All enrolled students recognized, ending session early")
                     break
             
-            cam.release()
-            cv2.destroyAllWindows()
+            grabber.stop()
+            if not headless:
+                cv2.destroyAllWindows()
+            self._stop_pool(pool)
+            if watcher is not None:
+                watcher.stop()
+            
+            self.last_session_stats = {**grabber.get_stats(), **session.get_stats()}
+            self.last_session_stats["mode"] = "headless" if headless else "gui"
+            self.last_session_stats.update(MODEL_CACHE.get_stats())
+            if watcher is not None:
+                self.last_session_stats.update(watcher.get_stats())
+            if governor is not None:
+                self.last_session_stats.update(governor.get_stats())
+            frames = self.last_session_stats["frames_processed"]
+            self.last_session_stats["avg_display_ms"] = round(display_time / frames * 1000, 2) if frames else 0.0
+            allocations = self.last_session_stats["frame_allocations"] + self.last_session_stats["gray_allocations"]
+            self.last_session_stats["buffer_allocations_per_frame"] = round(allocations / frames, 3) if frames else 0.0
+            print(f"Session stats: {self.last_session_stats}")
+            
+            self.last_absentees = session.get_absentees()
             
             # Save attendance
-            if attendance_records:
-                filepath, msg = self.attendance_handler.save_attendance(attendance_records, subject)
-                return True, len(recognized_students), msg
+            if session.attendance_records:
+                with timer.stage("persistence"):
+                    if journal is not None and journal.count == len(session.attendance_records):
+                        filepath, msg = self.attendance_handler.finalize_journal(journal, subject)
+                    else:
+                        if journal is not None:
+                            journal.discard()
+                        filepath, msg = self.attendance_handler.save_attendance(session.attendance_records, subject)
+                self._finish_timings(timer, filepath, subject)
+                if filepath is None:
+                    return False, 0, msg
+                if session.expected:
+                    msg = f"{msg} ({len(self.last_absentees)} absent)"
+                return True, len(session.recognized_students), msg
             else:
+                if journal is not None:
+                    journal.discard()
+                self._finish_timings(timer, None, subject)
                 return False, 0, "No attendance recorded"
         
         except Exception as e:
-            cv2.destroyAllWindows()
-            return False, 0, f"Error: {str(e)}"
\ No newline at end of file
+            if journal is not None:
+                # Keep whatever was recognized before the failure
+                self.attendance_handler.finalize_journal(journal, subject)
+            if grabber is not None:
+                grabber.stop()
+            if not headless:
+                cv2.destroyAllWindows()
+            self._stop_pool(pool)
+            if watcher is not None:
+                watcher.stop()
+            self._finish_timings(timer, None, subject)
+            return False, 0, f"Error: {str(e)}"
+    
+    def start_multi_camera(self, sources, duration=20, headless=False, stop_event=None, keyframe_interval=1,
+                           watch_model=True):
+        """
+        Take attendance from several cameras at once
+        All cameras share the global model since they may serve different subjects.
+        watch_model reloads a retrained model between frames (see start_attendance).
+        sources: list of (camera_index_or_url, subject)
+        Returns: dict of subject -> (success, student_count, message)
+        """
+        if not self.face_recognizer.load_model():
+            return {subject: (False, 0, "Model not found! Train first.") for _, subject in sources}
+        
+        self.roster_index.refresh()
+        if len(self.roster_index) == 0:
+            return {subject: (False, 0, "No students registered!") for _, subject in sources}
+        
+        manager = MultiCameraSessionManager(
+            self.face_recognizer, self.roster_index, self.attendance_handler,
+            keyframe_interval=keyframe_interval
+        )
+        try:
+            for source, subject in sources:
+                manager.add_source(source, subject)
+        except ValueError as e:
+            for stream in manager.streams:
+                if stream.session.journal is not None:
+                    stream.session.journal.discard()
+            return {subject: (False, 0, str(e)) for _, subject in sources}
+        
+        watcher = None
+        if watch_model:
+            watcher = ModelWatcher(self.face_recognizer, self.roster_index)
+            watcher.start()
+        try:
+            results = manager.run(duration=duration, stop_event=stop_event, headless=headless, watcher=watcher)
+        finally:
+            if watcher is not None:
+                watcher.stop()
+        self.last_session_stats = manager.last_stats
+        if watcher is not None:
+            self.last_session_stats.update(watcher.get_stats())
+        self.last_absentees = manager.last_absentees
+        return results
+    
+    def process_video(self, subject, video_path, workers=None, segment_seconds=300, sample_fps=5,
+                      recorded_at=None, detection_scale=1.0, keyframe_interval=1):
+        """
+        Take attendance from a recorded video instead of the live camera
+        The video is split into `segment_seconds` segments processed in parallel.
+        Returns: (success, student_count, message)
+        """
+        processor = VideoAttendanceProcessor(
+            self.haarcascade_path, self.model_path, self.student_details_path,
+            self.attendance_handler.attendance_path, recognizer_backend=self.face_recognizer.backend
+        )
+        result = processor.process(
+            video_path, subject, self.attendance_handler, workers=workers,
+            segment_seconds=segment_seconds, sample_fps=sample_fps, recorded_at=recorded_at,
+            detection_scale=detection_scale, keyframe_interval=keyframe_interval
+        )
+        self.last_session_stats = processor.last_stats
+        return result
+    
+    def _finish_timings(self, timer, session_file, subject):
+        """Detach the stage timer/tracer and save their output next to the session CSV"""
+        self.face_recognizer.timer = NULL_TIMER
+        self.attendance_handler.tracer = None
+        self.last_stage_timings = timer.summary()
+        print("Stage timings:")
+        timer.print_summary()
+        if session_file:
+            timer.save_summary(timings_path_for(session_file), extra=self.last_session_stats)
+        if timer.tracer is not None:
+            # Sessions without a CSV still get a trace, named like the CSV would have been
+            base = session_file or self.attendance_handler._session_filepath(subject)
+            self.last_trace = (timer.tracer, trace_path_for(base))
+            timer.tracer.save(self.last_trace[1])
+    
+    def announce(self, text):
+        """
+        Speak a session result; when the session was traced the TTS call is
+        added to its timeline (the trace file is written again)
+        """
+        if self.last_trace is None:
+            TextToSpeech.speak(text)
+            return
+        tracer, path = self.last_trace
+        TextToSpeech.speak(text, tracer=tracer)
+        tracer.save(path)
+    
+    def _stop_pool(self, pool):
+        """Detach and shut down a recognition pool"""
+        if pool is not None:
+            self.face_recognizer.recognition_pool = None
+            pool.stop()
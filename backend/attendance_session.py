@@ -0,0 +1,257 @@
+import cv2
+import time
+import datetime
+from backend.face_tracker import FaceTracker
+
+
+class AttendanceSession:
+    """Detection and recognition state for a single attendance session"""
+
+    def __init__(self, face_recognizer, attendance_handler, roster_index, subject, confidence_threshold=70,
+                 tracker=None, detector=None, motion_gate=None, journal=None, on_recognized=None):
+        self.face_recognizer = face_recognizer
+        self.attendance_handler = attendance_handler
+        self.roster_index = roster_index
+        self.subject = subject
+        self.confidence_threshold = confidence_threshold
+        # Tracks keep a confirmed identity so predict is skipped on later frames
+        self.tracker = tracker if tracker is not None else FaceTracker()
+        # Anything with get_faces_from_image(frame) -> (faces, gray), e.g. KeyframeDetector
+        self.detector = detector if detector is not None else face_recognizer
+        # Optional MotionGate: static frames skip detection and recognition
+        self.motion_gate = motion_gate
+        self.last_detections = []
+        # Optional AttendanceJournal that receives every record as it is made
+        self.journal = journal
+        # Optional callback(record) for each newly recorded student (called on the session thread)
+        self.on_recognized = on_recognized
+
+        self.attendance_records = []
+        self.recognized_students = set()
+        # student_id -> capture timestamp of the frame the student was first marked in
+        self.first_seen = {}
+        # Students enrolled in the subject who have not been seen yet
+        self.expected = roster_index.expected_for_subject(subject)
+        self.outstanding = set(self.expected)
+
+        # Statistics
+        self.start_time = time.time()
+        self.frames_processed = 0
+        self.processing_time = 0.0
+        self.frame_latency = 0.0
+        self.mark_latencies = []
+        self.predictions_made = 0
+        self.predictions_saved = 0
+        self.frames_skipped_static = 0
+        # This session's share of the recognizer's detection counters, which
+        # are shared by every session using the recognizer
+        self.detect_calls = 0
+        self.detect_time = 0.0
+        self.gray_allocations = 0
+
+    def process_frame(self, frame, captured_at=None):
+        """
+        Detect and recognize faces in a frame, recording new students.
+        Returns: list of detection dicts (box, status, student_id, name, confidence)
+        """
+        started = time.time()
+        if captured_at is None:
+            captured_at = started
+
+        if self.motion_gate is not None and not self.motion_gate.has_motion(frame) and self._tracks_settled():
+            # Nothing changed: keep existing tracks alive and reuse the last result
+            self.frames_skipped_static += 1
+            self._finish_frame(started, captured_at)
+            return self.last_detections
+
+        detections = []
+        recognizer = self.face_recognizer
+        counters = (recognizer.detect_calls, recognizer.detect_time, recognizer.gray_allocations)
+        faces, gray = self.detector.get_faces_from_image(frame)
+        self.detect_calls += recognizer.detect_calls - counters[0]
+        self.detect_time += recognizer.detect_time - counters[1]
+        self.gray_allocations += recognizer.gray_allocations - counters[2]
+
+        tracks = self.tracker.update(faces)
+
+        # Predict all uncommitted tracks of this frame, and committed ones due
+        # to be re-checked, in one batch
+        pending = [i for i, track in enumerate(tracks) if self.tracker.needs_prediction(track)]
+        crops = []
+        for i in pending:
+            x, y, w, h = faces[i]
+            crops.append(gray[y:y + h, x:x + w])
+        predictions = dict(zip(pending, self.face_recognizer.recognize_faces(
+            crops, confidence_threshold=self.confidence_threshold
+        )))
+        self.predictions_made += len(pending)
+
+        for i, ((x, y, w, h), track) in enumerate(zip(faces, tracks)):
+            if i not in predictions:
+                # Identity already confirmed on earlier frames
+                self.predictions_saved += 1
+                student_id, confidence, is_recognized = track.identity, track.confidence, True
+            else:
+                student_id, confidence, is_recognized = predictions[i]
+
+            detection = {
+                "box": (x, y, w, h),
+                "status": "not_recognized",
+                "student_id": student_id,
+                "name": None,
+                "confidence": confidence,
+                "track_id": track.track_id,
+            }
+
+            student = None
+            if is_recognized and student_id is not None:
+                with self.face_recognizer.timer.stage("roster_lookup"):
+                    student = self.roster_index.lookup(student_id)
+
+                if student is not None:
+                    name = student[1]
+                    detection["status"] = "recognized"
+                    detection["name"] = name
+                    self._mark_present(student_id, name, confidence, captured_at)
+                else:
+                    detection["status"] = "unknown"
+
+            if i in predictions:
+                self.tracker.record_prediction(track, student_id if student is not None else None, confidence)
+
+            detections.append(detection)
+
+        self.last_detections = detections
+        self._finish_frame(started, captured_at)
+        return detections
+
+    def _tracks_settled(self):
+        """True when no visible track is still waiting for an identity"""
+        return all(track.committed for track in self.tracker.tracks.values())
+
+    def _finish_frame(self, started, captured_at):
+        finished = time.time()
+        self.frames_processed += 1
+        self.processing_time += finished - started
+        self.frame_latency += finished - captured_at
+
+    def share_records_with(self, other):
+        """
+        Use the record list of another session for the same subject, so a
+        student seen by several cameras is only recorded once.
+        """
+        self.attendance_records = other.attendance_records
+        self.recognized_students = other.recognized_students
+        self.first_seen = other.first_seen
+        self.outstanding = other.outstanding
+        self.journal = other.journal
+
+    def _mark_present(self, student_id, name, confidence, captured_at):
+        """Record a student once per session"""
+        if student_id in self.recognized_students:
+            return
+
+        # Stamp the record with the frame time (live: capture time, video: position in recording)
+        ts = captured_at
+        date = datetime.datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
+        time_str = datetime.datetime.fromtimestamp(ts).strftime("%H:%M:%S")
+
+        record = self.attendance_handler.create_attendance_record(
+            student_id, name, self.subject, date, time_str
+        )
+        if record:
+            self.attendance_records.append(record)
+            self.recognized_students.add(student_id)
+            self.first_seen[student_id] = captured_at
+            self.outstanding.discard(student_id)
+            if self.journal is not None:
+                try:
+                    with self.face_recognizer.timer.stage("persistence"):
+                        self.journal.append(record)
+                except Exception as e:
+                    print(f"Error writing attendance journal: {str(e)}")
+            if self.on_recognized is not None:
+                self.on_recognized(record)
+            self.mark_latencies.append(time.time() - captured_at)
+            print(f"✓ Recognized: {name} (ID: {student_id}, Confidence: {confidence:.2f})")
+
+    def refresh_expected(self):
+        """Re-read the enrolled students after the roster index was swapped"""
+        expected = self.roster_index.expected_for_subject(self.subject)
+        # Update in place: cameras sharing records share the outstanding set
+        self.expected = expected
+        self.outstanding.clear()
+        self.outstanding.update(expected - self.recognized_students)
+
+    @property
+    def roster_complete(self):
+        """True once every student enrolled in the subject has been recorded"""
+        return bool(self.expected) and not self.outstanding
+
+    def get_absentees(self):
+        """Return [(enrollment, name)] of enrolled students not recorded this session"""
+        absentees = []
+        for label in sorted(self.outstanding):
+            student = self.roster_index.lookup(label)
+            if student is not None:
+                absentees.append((student[0], student[1]))
+        return absentees
+
+    def draw_detections(self, frame, detections, remaining):
+        """Draw face boxes, labels, timer and student count onto the frame"""
+        font_cv = cv2.FONT_HERSHEY_SIMPLEX
+
+        for detection in detections:
+            x, y, w, h = detection["box"]
+            confidence = detection["confidence"]
+
+            if detection["status"] == "recognized":
+                # Draw rectangle and name (Green = Recognized)
+                cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 260, 0), 4)
+                cv2.putText(frame, f"{detection['student_id']}-{detection['name']}", (x + h, y), font_cv, 1, (255, 255, 0), 4)
+                cv2.putText(frame, f"Conf: {confidence:.1f}%", (x, y + h + 20),
+                            font_cv, 0.6, (255, 255, 0), 2)
+            elif detection["status"] == "unknown":
+                # Unknown student
+                cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 25, 255), 7)
+                cv2.putText(frame, "Unknown Student", (x + h, y), font_cv, 1, (0, 25, 255), 4)
+            else:
+                # Face detected but not recognized (Orange = Low confidence)
+                cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 165, 255), 2)
+                cv2.putText(frame, "Not Recognized", (x + h, y), font_cv, 0.7, (0, 165, 255), 2)
+                if confidence:
+                    cv2.putText(frame, f"Conf: {confidence:.1f}%", (x, y + h + 20),
+                                font_cv, 0.6, (0, 165, 255), 2)
+
+        # Display timer and student count
+        cv2.putText(frame, f"Time: {remaining}s | Students: {len(self.recognized_students)}",
+                    (10, 30), font_cv, 1, (255, 255, 0), 2)
+
+    def get_stats(self):
+        """Return session statistics"""
+        elapsed = time.time() - self.start_time
+        latencies = self.mark_latencies
+        stats = {
+            "duration": round(elapsed, 2),
+            "frames_processed": self.frames_processed,
+            "processing_fps": round(self.frames_processed / elapsed, 2) if elapsed > 0 else 0.0,
+            "avg_frame_ms": round(self.processing_time / self.frames_processed * 1000, 2) if self.frames_processed else 0.0,
+            "avg_frame_latency_ms": round(self.frame_latency / self.frames_processed * 1000, 2) if self.frames_processed else 0.0,
+            "students_recognized": len(self.recognized_students),
+            "students_expected": len(self.expected),
+            "absentees": len(self.outstanding),
+            "predictions_made": self.predictions_made,
+            "predictions_saved": self.predictions_saved,
+            "frames_skipped_static": self.frames_skipped_static,
+            "avg_mark_latency_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            "max_mark_latency_ms": round(max(latencies) * 1000, 2) if latencies else 0.0,
+        }
+        stats.update(self.face_recognizer.get_detection_stats())
+        stats.update({
+            "detect_calls": self.detect_calls,
+            "avg_detect_ms": round(self.detect_time / self.detect_calls * 1000, 2) if self.detect_calls else 0.0,
+            "gray_allocations": self.gray_allocations,
+        })
+        if hasattr(self.detector, "get_stats"):
+            stats.update(self.detector.get_stats())
+        return stats
@@ -0,0 +1,128 @@
+import time
+
+
+class CpuGovernor:
+    """
+    Keep the attendance loop inside a CPU or latency budget.
+
+    Per-frame processing cost is measured over a window of frames. When the
+    loop is over budget the governor degrades one step at a time: longer
+    keyframe interval, then smaller detection scale, then frame skipping.
+    When there is clear headroom it restores settings in reverse order.
+
+    target_latency_ms: budget for processing one frame
+    target_cpu: budget for process CPU time / wall time (1.0 = one full core)
+    """
+
+    def __init__(self, target_latency_ms=None, target_cpu=None, window=15, headroom=0.6,
+                 min_scale=0.5, scale_step=0.125, max_keyframe_interval=8, max_frame_skip=3):
+        if target_latency_ms is None and target_cpu is None:
+            target_latency_ms = 100
+        self.target_latency_ms = target_latency_ms
+        self.target_cpu = target_cpu
+        self.window = window
+        self.headroom = headroom
+        self.min_scale = min_scale
+        self.scale_step = scale_step
+        self.max_keyframe_interval = max_keyframe_interval
+        self.max_frame_skip = max_frame_skip
+
+        # Current settings
+        self.keyframe_interval = 1
+        self.detection_scale = 1.0
+        self.frame_skip = 0
+
+        self._costs = []
+        self._frame_counter = 0
+        self._window_wall = time.perf_counter()
+        self._window_cpu = time.process_time()
+        self.adjustments = 0
+        self.frames_skipped = 0
+        self.last_load = 0.0
+
+    def should_process(self):
+        """Return False for frames that should be skipped under the current frame_skip"""
+        self._frame_counter += 1
+        if self.frame_skip and self._frame_counter % (self.frame_skip + 1) != 0:
+            self.frames_skipped += 1
+            return False
+        return True
+
+    def observe(self, frame_cost):
+        """
+        Record the processing time (seconds) of one frame.
+        Returns: True when settings changed and should be applied
+        """
+        self._costs.append(frame_cost)
+        if len(self._costs) < self.window:
+            return False
+
+        load = self._measure_load()
+        self._costs = []
+        self.last_load = load
+
+        if load > 1.0:
+            changed = self._degrade()
+        elif load < self.headroom:
+            changed = self._restore()
+        else:
+            changed = False
+        if changed:
+            self.adjustments += 1
+        return changed
+
+    def _measure_load(self):
+        """Load relative to the budget (1.0 = exactly on budget)"""
+        loads = []
+        if self.target_latency_ms:
+            avg_ms = sum(self._costs) / len(self._costs) * 1000
+            loads.append(avg_ms / self.target_latency_ms)
+        if self.target_cpu:
+            now_wall = time.perf_counter()
+            now_cpu = time.process_time()
+            wall = now_wall - self._window_wall
+            cpu = (now_cpu - self._window_cpu) / wall if wall > 0 else 0.0
+            loads.append(cpu / self.target_cpu)
+        self._window_wall = time.perf_counter()
+        self._window_cpu = time.process_time()
+        return max(loads)
+
+    def _degrade(self):
+        if self.keyframe_interval < self.max_keyframe_interval:
+            self.keyframe_interval = min(self.max_keyframe_interval, self.keyframe_interval * 2)
+            return True
+        if self.detection_scale - self.scale_step >= self.min_scale - 1e-9:
+            self.detection_scale = round(self.detection_scale - self.scale_step, 3)
+            return True
+        if self.frame_skip < self.max_frame_skip:
+            self.frame_skip += 1
+            return True
+        return False
+
+    def _restore(self):
+        if self.frame_skip > 0:
+            self.frame_skip -= 1
+            return True
+        if self.detection_scale < 1.0:
+            self.detection_scale = min(1.0, round(self.detection_scale + self.scale_step, 3))
+            return True
+        if self.keyframe_interval > 1:
+            self.keyframe_interval = max(1, self.keyframe_interval // 2)
+            return True
+        return False
+
+    def apply(self, face_recognizer, detector=None):
+        """Push the current settings into the recognizer and keyframe detector"""
+        face_recognizer.detection_scale = self.detection_scale
+        if detector is not None:
+            detector.keyframe_interval = self.keyframe_interval
+
+    def get_stats(self):
+        return {
+            "governor_adjustments": self.adjustments,
+            "governor_frames_skipped": self.frames_skipped,
+            "governor_load": round(self.last_load, 2),
+            "governor_keyframe_interval": self.keyframe_interval,
+            "governor_detection_scale": self.detection_scale,
+            "governor_frame_skip": self.frame_skip,
+        }
@@ -1,22 +1,106 @@
+import copy
 import cv2
 import os
+import re
+import shutil
+import threading
+import time
 import numpy as np
 from PIL import Image
+from backend.stage_timer import StageTimer, NULL_TIMER
+from backend.model_cache import MODEL_CACHE
+from backend.lbph_numpy import NumpyLBPHRecognizer
+from backend.lbph_compressed import CompressedLBPHRecognizer
+from backend.segmented_model import SegmentedRecognizer
+
+RECOGNIZER_BACKENDS = ("cv2", "numpy", "pca")
+# Model file suffix per backend, replacing the .yml extension
+MODEL_SUFFIXES = {"numpy": ".npz", "pca": ".pca.npz"}
+# Serializes loading models with their update segments and merging the
+# segments into the model files, so a load never sees a merge half done
+_SEGMENT_LOCK = threading.RLock()
+
+
+def save_model(recognizer, path):
+    """Save an LBPH model via a temporary file so readers never see a partial model"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    base, ext = os.path.splitext(path)
+    # Keep the extension: OpenCV picks the storage format from it
+    tmp_path = f"{base}.tmp{ext}"
+    recognizer.save(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def save_cv2_histograms(recognizer, histograms, labels, path):
+    """
+    Write an OpenCV LBPH model with the parameters of `recognizer` and the
+    given histograms, in the layout LBPHFaceRecognizer.save uses (OpenCV
+    cannot remove samples from a trained recognizer). Saved like save_model.
+    """
+    base, ext = os.path.splitext(path)
+    tmp_path = f"{base}.tmp{ext}"
+    storage = cv2.FileStorage(tmp_path, cv2.FILE_STORAGE_WRITE)
+    try:
+        storage.startWriteStruct("opencv_lbphfaces", cv2.FileNode_MAP)
+        storage.write("threshold", recognizer.getThreshold())
+        storage.write("radius", recognizer.getRadius())
+        storage.write("neighbors", recognizer.getNeighbors())
+        storage.write("grid_x", recognizer.getGridX())
+        storage.write("grid_y", recognizer.getGridY())
+        storage.startWriteStruct("histograms", cv2.FileNode_SEQ)
+        for histogram in histograms:
+            storage.write("", histogram)
+        storage.endWriteStruct()
+        storage.write("labels", np.asarray(labels, dtype=np.int32).reshape(-1, 1))
+        storage.startWriteStruct("labelsInfo", cv2.FileNode_SEQ)
+        storage.endWriteStruct()
+        storage.endWriteStruct()
+    finally:
+        storage.release()
+    os.replace(tmp_path, path)
+
 
 class FaceRecognizer:
-    def __init__(self, haarcascade_path, model_path):
+    def __init__(self, haarcascade_path, model_path, backend="cv2"):
+        """
+        backend: "cv2" (OpenCV LBPH, .yml models), "numpy" (NumpyLBPHRecognizer,
+        .npz models next to the .yml, batched prediction) or "pca"
+        (CompressedLBPHRecognizer, PCA-reduced .pca.npz models)
+        """
+        if backend not in RECOGNIZER_BACKENDS:
+            raise ValueError(f"Unknown recognizer backend: {backend}")
         self.haarcascade_path = haarcascade_path
         self.model_path = model_path
-        self.recognizer = cv2.face.LBPHFaceRecognizer_create()
+        self.backend = backend
+        self.recognizer = self._new_recognizer()
         self.cascade = None
+        # Run the cascade on a frame downscaled by this factor (1.0 = full resolution)
+        self.detection_scale = 1.0
+        self.detect_calls = 0
+        self.detect_time = 0.0
+        # Reused gray/downscaled buffers; gray is double-buffered so the previous
+        # frame's gray stays valid while the next one is converted
+        self._gray_buffers = [None, None]
+        self._gray_index = 0
+        self._small_buffer = None
+        self.gray_allocations = 0
+        # numpy backend: compare exactly against the samples of only the k students
+        # with the nearest centroid histogram (None = every training sample)
+        self.prune_top_k = None
+        # Optional RecognitionPool used by predict_faces for large batches
+        self.recognition_pool = None
+        # Path of the model file currently loaded (global model or a subject shard)
+        self.loaded_model_path = None
+        # Per-stage timings (StageTimer); NULL_TIMER records nothing
+        self.timer = NULL_TIMER
+        self.last_capture_timings = {}
         
-        # Safely load cascade with try-except
+        # Safely load cascade with try-except (parsed once per process, see ModelCache)
         try:
             if os.path.exists(haarcascade_path):
-                self.cascade = cv2.CascadeClassifier(haarcascade_path)
-                if self.cascade.empty():
+                self.cascade = MODEL_CACHE.get_cascade(haarcascade_path)
+                if self.cascade is None:
                     print(f"Warning: Haarcascade file is empty or invalid: {haarcascade_path}")
-                    self.cascade = None
                 else:
                     print(f"✓ Haarcascade loaded successfully")
             else:
@@ -25,36 +109,397 @@ class FaceRecognizer:
             print(f"Error loading haarcascade: {str(e)}")
             self.cascade = None
     
-    def load_model(self):
-        """Load trained model"""
+    def _new_recognizer(self):
+        if self.backend == "numpy":
+            return NumpyLBPHRecognizer()
+        if self.backend == "pca":
+            return CompressedLBPHRecognizer()
+        return cv2.face.LBPHFaceRecognizer_create()
+    
+    def model_file(self, path):
+        """File the current backend stores the model at `path` (.yml) in"""
+        if self.backend in MODEL_SUFFIXES:
+            return os.path.splitext(path)[0] + MODEL_SUFFIXES[self.backend]
+        return path
+    
+    def model_source(self, model_file):
+        """The .yml a model file of this backend is converted from (itself for cv2)"""
+        suffix = MODEL_SUFFIXES.get(self.backend)
+        if suffix and model_file.endswith(suffix):
+            return model_file[:-len(suffix)] + ".yml"
+        return model_file
+    
+    def _get_cached_model(self, path):
+        """
+        Load the model at `path` for this backend through MODEL_CACHE
+        The numpy and pca backends import the OpenCV model when they have no
+        model file yet or the .yml was retrained since.
+        Update segments registered since the model was saved are searched
+        along with it (SegmentedRecognizer).
+        Returns: (recognizer, labels) or (None, None) if there is no model
+        """
+        with _SEGMENT_LOCK:
+            model_file = self.model_file(path)
+            if model_file != path and os.path.exists(path) and (
+                    not os.path.exists(model_file) or os.path.getmtime(path) > os.path.getmtime(model_file)):
+                cv2_recognizer, _ = MODEL_CACHE.get_model(path)
+                recognizer = type(self._new_recognizer()).from_cv2(cv2_recognizer)
+                save_model(recognizer, model_file)
+                MODEL_CACHE.store(model_file, recognizer)
+                print(f"✓ Converted {os.path.basename(path)} for the {self.backend} backend")
+            recognizer, labels = MODEL_CACHE.get_model(model_file)
+            segments = self.segment_files(path)
+            if not segments:
+                return recognizer, labels
+            
+            parts = [recognizer] if recognizer is not None else []
+            labels = set(labels or ())
+            for segment in segments:
+                part, part_labels = MODEL_CACHE.get_model(segment)
+                if self.backend != "cv2":
+                    part = type(self._new_recognizer()).from_cv2(part)
+                parts.append(part)
+                labels |= part_labels
+            return SegmentedRecognizer(parts), frozenset(labels)
+    
+    def segment_dir(self, path):
+        """Directory of the update segments of the model at `path` (.yml)"""
+        return os.path.splitext(path)[0] + ".segments"
+    
+    def segment_files(self, path):
+        """Update segments of the model at `path`, oldest first"""
+        segment_dir = self.segment_dir(path)
+        if not os.path.isdir(segment_dir):
+            return []
+        # Segments are named by creation time; .tmp. files are still being written
+        return [os.path.join(segment_dir, name) for name in sorted(os.listdir(segment_dir))
+                if name.endswith(".yml") and ".tmp." not in name]
+    
+    def _stored_files(self, path):
+        """
+        Existing files of the model at `path` (.yml) in every format, the .yml first
+        A converted model older than its .yml misses students added since;
+        it is deleted here, to be converted again when next loaded.
+        """
+        base = os.path.splitext(path)[0]
+        files = [path] if os.path.exists(path) else []
+        for suffix in MODEL_SUFFIXES.values():
+            model_file = base + suffix
+            if not os.path.exists(model_file):
+                continue
+            if files and os.path.getmtime(path) > os.path.getmtime(model_file):
+                os.remove(model_file)
+                MODEL_CACHE.invalidate(model_file)
+            else:
+                files.append(model_file)
+        return files
+    
+    def _discard_model_files(self, path, keep=None):
+        """Delete the model at `path` (.yml) in every format but `keep`, and its update segments"""
+        base = os.path.splitext(path)[0]
+        for model_file in [path] + [base + suffix for suffix in MODEL_SUFFIXES.values()]:
+            if model_file != keep and os.path.exists(model_file):
+                os.remove(model_file)
+                MODEL_CACHE.invalidate(model_file)
+        shutil.rmtree(self.segment_dir(path), ignore_errors=True)
+    
+    def merge_segments(self, path):
+        """
+        Fold the update segments of the model at `path` (.yml) into every
+        stored format of it (see update_model)
+        This rewrites each model file once for any number of registrations;
+        it is done in the background at startup (merge_all_segments) and
+        before students are removed, never while registering.
+        Returns: True if segments were merged
+        """
+        with _SEGMENT_LOCK:
+            segments = self.segment_files(path)
+            if not segments:
+                return False
+            parts = []
+            for segment in segments:
+                part = cv2.face.LBPHFaceRecognizer_create()
+                part.read(segment)
+                parts.append(part)
+            histograms = [np.asarray(h, dtype=np.float32).reshape(1, -1) for part in parts for h in part.getHistograms()]
+            labels = np.concatenate([np.asarray(part.getLabels(), dtype=np.int32).reshape(-1) for part in parts])
+            
+            stored = self._stored_files(path)
+            if not stored:
+                # The model was deleted since; the segments make up a new one
+                save_cv2_histograms(parts[0], histograms, labels, path)
+            # The .yml first, so the converted models stay newer than it
+            for model_file in stored:
+                # Formats no session has loaded are not kept in memory
+                recognizer, _ = MODEL_CACHE.get_model(model_file, cache=False)
+                if model_file.endswith(".npz"):
+                    # add_histograms() replaces the arrays, so the cached instance is untouched
+                    recognizer = copy.copy(recognizer)
+                    recognizer.add_histograms(np.vstack(histograms), labels)
+                    save_model(recognizer, model_file)
+                    MODEL_CACHE.refresh(model_file, recognizer)
+                else:
+                    save_cv2_histograms(recognizer, list(recognizer.getHistograms()) + histograms,
+                                        np.concatenate([recognizer.getLabels().reshape(-1), labels]), model_file)
+                    # Parsed again on next use
+                    MODEL_CACHE.invalidate(model_file)
+            for segment in segments:
+                os.remove(segment)
+                MODEL_CACHE.invalidate(segment)
+            print(f"✓ Merged {len(segments)} registrations into {os.path.basename(path)}")
+            return True
+    
+    def model_paths(self):
+        """The global model and every subject shard (.yml paths, stored in any format)"""
+        paths = [self.model_path]
+        shard_dir = self.shard_dir()
+        if os.path.isdir(shard_dir):
+            paths += sorted({os.path.join(shard_dir, name.split(".")[0] + ".yml") for name in os.listdir(shard_dir)})
+        return paths
+    
+    def merge_all_segments(self):
+        """merge_segments for the global model and every shard; returns the number merged"""
+        merged = 0
+        for path in self.model_paths():
+            try:
+                merged += self.merge_segments(path)
+            except Exception as e:
+                print(f"Error merging registrations into {os.path.basename(path)}: {str(e)}")
+        return merged
+    
+    def shard_dir(self):
+        """Directory holding the per-subject model shards"""
+        return os.path.join(os.path.dirname(self.model_path), "shards")
+    
+    def shard_path(self, subject):
+        """Path of the per-subject model shard for `subject`"""
+        safe = re.sub(r"[^A-Za-z0-9_-]+", "_", str(subject).strip())
+        return os.path.join(self.shard_dir(), f"{safe}.yml")
+    
+    def load_model(self, subject=None, expected_labels=None, fallback_to_global=True):
+        """
+        Load trained model
+        With `subject`, load only that subject's shard. The shard is skipped
+        (falling back to the global model if allowed) when it is missing or
+        does not contain every label in `expected_labels`.
+        Parsed models are shared through MODEL_CACHE and only re-read when the
+        file changed on disk.
+        """
         try:
-            if not os.path.exists(self.model_path):
+            if subject is not None:
+                shard = self.shard_path(subject)
+                recognizer, labels = self._get_cached_model(shard)
+                if recognizer is not None:
+                    if expected_labels is None or set(expected_labels) <= labels:
+                        self.recognizer = recognizer
+                        self.loaded_model_path = self.model_file(shard)
+                        print(f"✓ Model shard loaded for {subject} ({len(labels)} students)")
+                        return True
+                    print(f"Model shard for {subject} is out of date")
+                if not fallback_to_global:
+                    print(f"No usable model shard for {subject}")
+                    return False
+            
+            recognizer, _ = self._get_cached_model(self.model_path)
+            if recognizer is None:
                 print(f"Model not found at {self.model_path}")
                 return False
             
-            self.recognizer.read(self.model_path)
+            self.recognizer = recognizer
+            self.loaded_model_path = self.model_file(self.model_path)
             print(f"✓ Model loaded successfully")
             return True
         except Exception as e:
             print(f"Error loading model: {str(e)}")
             return False
     
-    def train_model(self, faces, ids):
-        """Train the face recognition model"""
+    def train_model(self, faces, ids, subject_labels=None):
+        """
+        Train the face recognition model
+        subject_labels: optional {subject: set of labels}; when given, a model
+        shard is also trained for every subject and the shards of any other
+        subject are deleted (see train_subject_shards).
+        """
         try:
             if len(faces) == 0:
                 raise ValueError("No training images found")
             
             print(f"Training model with {len(faces)} images from {len(set(ids))} students...")
-            self.recognizer.train(faces, np.array(ids))
-            os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-            self.recognizer.save(self.model_path)
+            # Train a new recognizer: the current one may be shared through the cache
+            recognizer = self._new_recognizer()
+            recognizer.train(faces, np.array(ids))
+            model_file = self.model_file(self.model_path)
+            save_model(recognizer, model_file)
+            MODEL_CACHE.store(model_file, recognizer)
+            # Other formats and pending update segments are older than this model
+            self._discard_model_files(self.model_path, keep=model_file)
+            self.recognizer = recognizer
+            self.loaded_model_path = model_file
             print(f"✓ Model trained and saved successfully")
+            
+            if subject_labels is not None:
+                self.train_subject_shards(faces, ids, subject_labels)
             return True
         except Exception as e:
             print(f"Error training model: {str(e)}")
             return False
     
+    def train_subject_shards(self, faces, ids, subject_labels):
+        """
+        Train one model per subject containing only its enrolled students
+        Shard files of subjects not in `subject_labels`, in any format, are
+        deleted: they still hold the faces of students trained before.
+        subject_labels: {subject: set of labels}
+        Returns: number of shards written
+        """
+        self._prune_shards({os.path.basename(self.shard_path(subject)) for subject in subject_labels})
+        written = 0
+        for subject, labels in subject_labels.items():
+            try:
+                picked = [i for i, label in enumerate(ids) if label in labels]
+                shard = self.model_file(self.shard_path(subject))
+                if not picked:
+                    # Nobody enrolled has training images; drop any stale shard
+                    self._discard_model_files(self.shard_path(subject))
+                    continue
+                
+                recognizer = self._new_recognizer()
+                recognizer.train([faces[i] for i in picked], np.array([ids[i] for i in picked]))
+                save_model(recognizer, shard)
+                MODEL_CACHE.store(shard, recognizer)
+                self._discard_model_files(self.shard_path(subject), keep=shard)
+                written += 1
+            except Exception as e:
+                print(f"Error training shard for {subject}: {str(e)}")
+        print(f"✓ Trained {written} subject model shards")
+        return written
+    
+    def _prune_shards(self, keep):
+        """Delete every shard file whose .yml name is not in `keep`"""
+        shard_dir = self.shard_dir()
+        if not os.path.isdir(shard_dir):
+            return
+        for name in os.listdir(shard_dir):
+            if name.split(".")[0] + ".yml" in keep:
+                continue
+            path = os.path.join(shard_dir, name)
+            try:
+                if os.path.isdir(path):
+                    # Update segments
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+                    MODEL_CACHE.invalidate(path)
+            except OSError as e:
+                print(f"Error removing old shard {name}: {str(e)}")
+    
+    def _add_segment(self, path, faces, ids):
+        """
+        Save samples for the model at `path` (.yml) as an update segment, or
+        as the model itself if there is none yet. Segments are always in the
+        OpenCV layout, which every backend imports.
+        """
+        recognizer = cv2.face.LBPHFaceRecognizer_create()
+        recognizer.train(faces, np.array(ids))
+        if not self._stored_files(path):
+            save_model(recognizer, path)
+            return
+        save_model(recognizer, os.path.join(self.segment_dir(path), f"{time.time_ns()}.yml"))
+    
+    def update_model(self, faces, ids, subjects=None):
+        """
+        Add the samples of newly registered students to the saved model
+        Only these faces are encoded, and they are saved as a small update
+        segment next to the model instead of rewriting it, so the cost does
+        not depend on how many students are already enrolled. Loading the
+        model picks the segments up; merge_segments folds them in later.
+        subjects: subjects the new students take; their shards are updated too
+        (a missing shard is started from these samples).
+        Returns False when there is no saved model to update (use train_model).
+        """
+        try:
+            if len(faces) == 0:
+                raise ValueError("No training images found")
+            
+            if not self._stored_files(self.model_path):
+                print("No trained model to update")
+                return False
+            self._add_segment(self.model_path, faces, ids)
+            print(f"✓ Model updated with {len(faces)} images from {len(set(ids))} students")
+            
+            for subject in subjects or ():
+                try:
+                    self._add_segment(self.shard_path(subject), faces, ids)
+                except Exception as e:
+                    print(f"Error updating shard for {subject}: {str(e)}")
+            return True
+        except Exception as e:
+            print(f"Error updating model: {str(e)}")
+            return False
+    
+    def remove_labels(self, labels):
+        """
+        Remove every sample of `labels` from the saved global model and the
+        subject shards, in every stored format, without retraining
+        A model left without students is deleted.
+        Returns: (number of model files changed, model files that could not
+        be updated and may still hold the students)
+        """
+        labels = set(labels)
+        changed = 0
+        failed = []
+        for path in self.model_paths():
+            try:
+                # Pending registrations may hold samples of these students too
+                self.merge_segments(path)
+                # Stale converted models are dropped rather than edited, which
+                # would make them look current
+                stored = self._stored_files(path)
+            except Exception as e:
+                print(f"Error removing students from {os.path.basename(path)}: {str(e)}")
+                failed.append(path)
+                continue
+            # The .yml first, so the edited converted models stay newer than it
+            for model_file in stored:
+                try:
+                    if self._remove_from_model_file(model_file, labels):
+                        changed += 1
+                except Exception as e:
+                    print(f"Error removing students from {os.path.basename(model_file)}: {str(e)}")
+                    failed.append(model_file)
+        print(f"✓ Removed {len(labels)} students from {changed} model files")
+        return changed, failed
+    
+    def _remove_from_model_file(self, model_file, labels):
+        """
+        Drop `labels` from one model file; returns True if it changed
+        Every format of every shard is read here, so models are not added to
+        MODEL_CACHE; those a session already loaded are refreshed.
+        """
+        recognizer, present = MODEL_CACHE.get_model(model_file, cache=False)
+        if recognizer is None or not labels & present:
+            return False
+        if present <= labels:
+            # Nobody left, like train_subject_shards dropping an empty shard
+            os.remove(model_file)
+            MODEL_CACHE.invalidate(model_file)
+            return True
+        
+        if model_file.endswith(".npz"):
+            # remove() replaces the arrays, so the cached instance is untouched
+            recognizer = copy.copy(recognizer)
+            recognizer.remove(labels)
+            save_model(recognizer, model_file)
+            MODEL_CACHE.refresh(model_file, recognizer)
+        else:
+            model_labels = recognizer.getLabels().reshape(-1)
+            keep = [i for i, label in enumerate(model_labels) if int(label) not in labels]
+            histograms = recognizer.getHistograms()
+            save_cv2_histograms(recognizer, [histograms[i] for i in keep], model_labels[keep], model_file)
+            # Parsed again on next use
+            MODEL_CACHE.invalidate(model_file)
+        return True
+    
     def predict_face(self, face_image):
         """Predict face ID and confidence"""
         try:
@@ -64,29 +509,131 @@ class FaceRecognizer:
             print(f"Error predicting face: {str(e)}")
             return None, None
     
-    def get_faces_from_image(self, image):
-        """Detect faces in image"""
+    def predict_faces(self, face_images):
+        """
+        Predict a batch of face crops
+        Uses the recognition pool when one is attached and the batch is large enough,
+        and the numpy backend's single vectorized predict_batch otherwise.
+        Returns: list of (Id, conf), (None, None) for failed predictions
+        """
+        if not face_images:
+            return []
+        
+        with self.timer.stage("predict"):
+            pool = self.recognition_pool
+            if pool is not None and len(face_images) >= pool.min_batch:
+                try:
+                    return pool.predict_batch(face_images)
+                except Exception as e:
+                    print(f"Error in recognition pool, falling back to serial: {str(e)}")
+            recognizer = self.recognizer
+            if hasattr(recognizer, "predict_batch"):
+                try:
+                    return recognizer.predict_batch(face_images, top_k=self.prune_top_k)
+                except Exception as e:
+                    # e.g. one crop too small; predict one by one so the others still count
+                    print(f"Error in batch prediction, falling back to serial: {str(e)}")
+            return [self.predict_face(face_image) for face_image in face_images]
+    
+    def get_faces_from_image(self, image, detection_scale=None):
+        """
+        Detect faces in image
+        With detection_scale < 1 the cascade searches a downscaled copy and the
+        boxes are mapped back to full-resolution coordinates, so crops taken
+        from the returned gray frame keep their full detail.
+        Returns: (faces, gray)
+        """
         try:
             if self.cascade is None:
                 print("Error: Cascade classifier not loaded")
                 return [], None
             
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            # FIXED: Better face detection parameters
-            faces = self.cascade.detectMultiScale(
-                gray,
-                scaleFactor=1.1,      # More sensitive detection
-                minNeighbors=5,       # Better accuracy
-                minSize=(30, 30),     # Minimum face size
-                maxSize=(300, 300)    # Maximum face size
-            )
+            scale = self.detection_scale if detection_scale is None else detection_scale
+            started = time.perf_counter()
+            
+            with self.timer.stage("convert"):
+                gray = self._to_gray(image)
+                if 0 < scale < 1.0:
+                    small = self._downscale(gray, scale)
+                else:
+                    scale = 1.0
+                    small = gray
+            
+            with self.timer.stage("detect"):
+                # FIXED: Better face detection parameters
+                faces = self.cascade.detectMultiScale(
+                    small,
+                    scaleFactor=1.1,      # More sensitive detection
+                    minNeighbors=5,       # Better accuracy
+                    minSize=(max(1, int(30 * scale)), max(1, int(30 * scale))),     # Minimum face size
+                    maxSize=(int(300 * scale), int(300 * scale))    # Maximum face size
+                )
+            
+            if scale != 1.0 and len(faces) > 0:
+                faces = np.round(np.asarray(faces) / scale).astype(int)
+                # Keep boxes inside the full-resolution frame
+                faces[:, 0] = np.clip(faces[:, 0], 0, gray.shape[1] - 1)
+                faces[:, 1] = np.clip(faces[:, 1], 0, gray.shape[0] - 1)
+                faces[:, 2] = np.minimum(faces[:, 2], gray.shape[1] - faces[:, 0])
+                faces[:, 3] = np.minimum(faces[:, 3], gray.shape[0] - faces[:, 1])
+            
+            self.detect_calls += 1
+            self.detect_time += time.perf_counter() - started
             return faces, gray
         except Exception as e:
             print(f"Error detecting faces: {str(e)}")
             return [], None
     
-    def capture_faces(self, enrollment_id, name, training_path, samples=50):
-        """Capture face images from camera"""
+    def _to_gray(self, image):
+        """Convert to gray into the next reused buffer"""
+        self._gray_index ^= 1
+        buffer = self._gray_buffers[self._gray_index]
+        if buffer is None or buffer.shape != image.shape[:2]:
+            buffer = np.empty(image.shape[:2], dtype=np.uint8)
+            self._gray_buffers[self._gray_index] = buffer
+            self.gray_allocations += 1
+        cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=buffer)
+        return buffer
+    
+    def _downscale(self, gray, scale):
+        """Resize into a reused buffer for detection"""
+        size = (max(1, int(gray.shape[1] * scale)), max(1, int(gray.shape[0] * scale)))
+        buffer = self._small_buffer
+        if buffer is None or buffer.shape != (size[1], size[0]):
+            buffer = np.empty((size[1], size[0]), dtype=np.uint8)
+            self._small_buffer = buffer
+            self.gray_allocations += 1
+        cv2.resize(gray, size, dst=buffer, interpolation=cv2.INTER_AREA)
+        return buffer
+    
+    def reset_detection_stats(self):
+        """Clear detection timing counters"""
+        self.detect_calls = 0
+        self.detect_time = 0.0
+        self.gray_allocations = 0
+    
+    def get_detection_stats(self):
+        """Return detection scale and average detection time per call"""
+        return {
+            "recognizer_backend": self.backend,
+            "prune_top_k": self.prune_top_k,
+            "detection_scale": self.detection_scale,
+            "detect_calls": self.detect_calls,
+            "avg_detect_ms": round(self.detect_time / self.detect_calls * 1000, 2) if self.detect_calls else 0.0,
+            "gray_allocations": self.gray_allocations,
+        }
+    
+    def capture_faces(self, enrollment_id, name, training_path, samples=50, headless=False,
+                      stop_event=None, max_duration=None):
+        """
+        Capture face images from camera
+        headless=True skips drawing and HighGUI windows; capture then stops when
+        enough samples are saved, `stop_event` is set or `max_duration` seconds pass.
+        """
+        timer = StageTimer()
+        previous_timer = self.timer
+        self.timer = timer
+        camera = None
         try:
             camera = cv2.VideoCapture(0)
             if not camera.isOpened():
@@ -97,57 +644,90 @@ class FaceRecognizer:
             os.makedirs(folder_path, exist_ok=True)
             
             print(f"Capturing {samples} samples for {name} (ID: {enrollment_id})...")
+            start_time = time.time()
+            frame = None
             
             while True:
-                ret, frame = camera.read()
+                with timer.stage("capture"):
+                    # Decode into the previous frame's buffer
+                    ret, frame = camera.read(image=frame) if frame is not None else camera.read()
                 if not ret:
                     break
                 
                 faces, gray = self.get_faces_from_image(frame)
                 
-                if len(faces) == 0:
+                if len(faces) == 0 and not headless:
                     # Show message if no face detected
                     cv2.putText(frame, "No face detected", (50, 50), 
                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
                 
                 for (x, y, w, h) in faces:
-                    cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
                     sample_num += 1
                     
-                    # Save the face region
+                    # Save the face region (a view; imwrite copies it to disk)
                     face_region = gray[y:y + h, x:x + w]
                     image_path = os.path.join(folder_path, f"{name}_{enrollment_id}_{sample_num}.jpg")
-                    cv2.imwrite(image_path, face_region)
+                    with timer.stage("persistence"):
+                        cv2.imwrite(image_path, face_region)
                     
-                    # Display progress
-                    cv2.putText(frame, f"Samples: {sample_num}/{samples}", (x, y - 10), 
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                    cv2.putText(frame, name, (x, y + h + 25),
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-                
-                cv2.imshow(f"Capturing face for {name} - Press ESC to stop", frame)
-                key = cv2.waitKey(100) & 0xFF
+                    if not headless:
+                        with timer.stage("draw"):
+                            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+                            # Display progress
+                            cv2.putText(frame, f"Samples: {sample_num}/{samples}", (x, y - 10), 
+                                      cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+                            cv2.putText(frame, name, (x, y + h + 25),
+                                      cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
                 
-                if key == 27 or sample_num >= samples:  # ESC key or samples reached
+                if sample_num >= samples:
+                    break
+                if stop_event is not None and stop_event.is_set():
                     break
+                if max_duration is not None and time.time() - start_time >= max_duration:
+                    break
+                
+                if not headless:
+                    with timer.stage("display"):
+                        cv2.imshow(f"Capturing face for {name} - Press ESC to stop", frame)
+                        key = cv2.waitKey(100) & 0xFF
+                    
+                    if key == 27:  # ESC key
+                        break
+                else:
+                    # Keep the same sample spacing as waitKey(100) for pose variety
+                    time.sleep(0.1)
             
-            camera.release()
-            cv2.destroyAllWindows()
+            self.last_capture_timings = timer.summary()
+            print("Capture stage timings:")
+            timer.print_summary()
             
             return sample_num, f"✓ Captured {sample_num} images for {name}"
         
         except Exception as e:
-            cv2.destroyAllWindows()
             return 0, f"Error: {str(e)}"
+        finally:
+            # Every exit, including "Camera not found", detaches the timer
+            self.timer = previous_timer
+            if camera is not None:
+                camera.release()
+            if not headless:
+                cv2.destroyAllWindows()
     
-    def get_training_data(self, training_path):
-        """Extract training data from images"""
+    def get_training_data(self, training_path, enrollment_id=None):
+        """
+        Extract training data from images
+        enrollment_id: only read that student's folder
+        """
         try:
             if not os.path.exists(training_path):
                 return [], []
             
-            student_folders = [os.path.join(training_path, d) for d in os.listdir(training_path) 
-                             if os.path.isdir(os.path.join(training_path, d))]
+            if enrollment_id is not None:
+                folder = os.path.join(training_path, str(enrollment_id))
+                student_folders = [folder] if os.path.isdir(folder) else []
+            else:
+                student_folders = [os.path.join(training_path, d) for d in os.listdir(training_path) 
+                                 if os.path.isdir(os.path.join(training_path, d))]
             
             if len(student_folders) == 0:
                 return [], []
@@ -203,4 +783,17 @@ class FaceRecognizer:
             return student_id, confidence, is_recognized
         except Exception as e:
             print(f"Error recognizing face: {str(e)}")
-            return None, None, False
\ No newline at end of file
+            return None, None, False
+    
+    def recognize_faces(self, face_images, confidence_threshold=70):
+        """
+        Recognize a batch of faces with confidence threshold
+        Returns: list of (student_id, confidence, is_recognized)
+        """
+        results = []
+        for student_id, confidence in self.predict_faces(face_images):
+            if student_id is None:
+                results.append((None, None, False))
+            else:
+                results.append((student_id, confidence, confidence < confidence_threshold))
+        return results
@@ -0,0 +1,169 @@
+import itertools
+
+
+def box_iou(a, b):
+    """Intersection-over-union of two (x, y, w, h) boxes"""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+def box_centroid(box):
+    x, y, w, h = box
+    return (x + w / 2.0, y + h / 2.0)
+
+
+class FaceTrack:
+    """A face followed across frames"""
+
+    def __init__(self, track_id, box):
+        self.track_id = track_id
+        self.box = tuple(int(v) for v in box)
+        self.missed = 0
+        self.age = 0
+
+        # Identity voting
+        self.candidate = None
+        self.streak = 0
+        self.identity = None
+        self.confidence = None
+        # Age at the last prediction, and whether the box jumped since
+        # (a committed identity is re-checked then, see FaceTracker)
+        self.predicted_at = 0
+        self.box_jumped = False
+
+    @property
+    def committed(self):
+        return self.identity is not None
+
+    def add_prediction(self, label, confidence):
+        """
+        Add a recognizer result for this track. `label` is None when the face
+        was not recognized. The track commits once `streak` agreeing
+        predictions have been seen in a row.
+        """
+        self.confidence = confidence
+        self.predicted_at = self.age
+        self.box_jumped = False
+        if self.committed and label != self.identity:
+            # Someone else took over the box: vote for an identity again
+            self.identity = None
+            self.candidate = None
+            self.streak = 0
+        if label is None:
+            self.candidate = None
+            self.streak = 0
+            return
+
+        if label == self.candidate:
+            self.streak += 1
+        else:
+            self.candidate = label
+            self.streak = 1
+
+
+class FaceTracker:
+    """
+    Lightweight IoU/centroid tracker that gives detected face boxes a
+    persistent track ID between frames.
+
+    A committed identity is not trusted forever: another person can step
+    into the box of a face that just left. Committed tracks are predicted
+    again every `verify_interval` frames, or on the next frame after their
+    box moved with an IoU below `verify_iou`, and a different result
+    drops the commitment.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_centroid_shift=0.5, max_missed=5, commit_votes=3,
+                 verify_interval=30, verify_iou=0.5):
+        self.iou_threshold = iou_threshold
+        # Allowed centroid movement as a fraction of the box width when IoU fails
+        self.max_centroid_shift = max_centroid_shift
+        self.max_missed = max_missed
+        self.commit_votes = commit_votes
+        self.verify_interval = verify_interval
+        self.verify_iou = verify_iou
+        self.tracks = {}
+        self._ids = itertools.count(1)
+
+    def update(self, boxes):
+        """
+        Match this frame's boxes to existing tracks.
+        Returns: list of FaceTrack, one per input box (same order)
+        """
+        boxes = [tuple(int(v) for v in b) for b in boxes]
+        assigned = [None] * len(boxes)
+        free_tracks = set(self.tracks)
+
+        # Greedy matching on IoU, best pairs first
+        pairs = []
+        for i, box in enumerate(boxes):
+            for tid in free_tracks:
+                iou = box_iou(box, self.tracks[tid].box)
+                if iou >= self.iou_threshold:
+                    pairs.append((iou, i, tid))
+        pairs.sort(reverse=True)
+        for iou, i, tid in pairs:
+            if assigned[i] is None and tid in free_tracks:
+                assigned[i] = tid
+                free_tracks.discard(tid)
+
+        # Fall back to centroid distance for fast-moving faces
+        for i, box in enumerate(boxes):
+            if assigned[i] is not None:
+                continue
+            cx, cy = box_centroid(box)
+            best_tid, best_dist = None, None
+            for tid in free_tracks:
+                tx, ty = box_centroid(self.tracks[tid].box)
+                dist = ((cx - tx) ** 2 + (cy - ty) ** 2) ** 0.5
+                if dist <= self.max_centroid_shift * max(box[2], 1) and (best_dist is None or dist < best_dist):
+                    best_tid, best_dist = tid, dist
+            if best_tid is not None:
+                assigned[i] = best_tid
+                free_tracks.discard(best_tid)
+
+        result = []
+        for i, box in enumerate(boxes):
+            if assigned[i] is None:
+                track = FaceTrack(next(self._ids), box)
+                self.tracks[track.track_id] = track
+            else:
+                track = self.tracks[assigned[i]]
+                if box_iou(box, track.box) < self.verify_iou:
+                    track.box_jumped = True
+                track.box = box
+                track.missed = 0
+            track.age += 1
+            result.append(track)
+
+        # Age out tracks that were not seen this frame
+        for tid in free_tracks:
+            track = self.tracks[tid]
+            track.missed += 1
+            if track.missed > self.max_missed:
+                del self.tracks[tid]
+
+        return result
+
+    def needs_prediction(self, track):
+        """True if the track has no identity yet or its identity is due to be re-checked"""
+        if not track.committed:
+            return True
+        return track.box_jumped or track.age - track.predicted_at >= self.verify_interval
+
+    def record_prediction(self, track, label, confidence):
+        """
+        Feed a prediction into a track and commit it once enough agree
+        A committed track whose prediction disagrees starts voting again.
+        """
+        track.add_prediction(label, confidence)
+        if not track.committed and track.streak >= self.commit_votes:
+            track.identity = track.candidate
+
+    def reset(self):
+        self.tracks = {}
@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+from backend.stage_timer import NULL_TIMER
+
+
+class FrameGrabber:
+    """Read camera frames on a background thread into a small ring buffer.
+
+    Only the newest `buffer_size` frames are kept; older frames are dropped
+    so the processing stage always works on the freshest image.
+
+    Frame arrays are recycled: the camera decodes into a free buffer via
+    read(image=...), and dropped frames go back to the free list. A frame
+    returned by read_latest stays valid until the next read_latest call.
+    """
+
+    def __init__(self, source=0, buffer_size=2, timer=None):
+        self.source = source
+        # Stage timer for camera reads (runs on the capture thread)
+        self.timer = timer if timer is not None else NULL_TIMER
+        self.buffer_size = max(1, int(buffer_size))
+        self.frames = deque(maxlen=self.buffer_size)
+        self.lock = threading.Lock()
+        self.frame_ready = threading.Condition(self.lock)
+        self.camera = None
+        self.thread = None
+        self.running = False
+
+        # Buffer pool: ring + one held by the consumer + one being decoded
+        self.free_buffers = []
+        self.held = None
+
+        # Counters
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.frames_taken = 0
+        self.frame_allocations = 0
+
+    def start(self):
+        """Open the camera and start the capture thread. Returns True on success"""
+        try:
+            self.camera = cv2.VideoCapture(self.source)
+            if not self.camera.isOpened():
+                self.camera.release()
+                self.camera = None
+                return False
+
+            self.running = True
+            self.thread = threading.Thread(target=self._capture_loop, name="FrameGrabber", daemon=True)
+            self.thread.start()
+            return True
+        except Exception as e:
+            print(f"Error starting camera: {str(e)}")
+            self.running = False
+            return False
+
+    def _capture_loop(self):
+        """
+        Continuously read frames until stopped or the camera fails
+        The camera is released here on exit, so it is never released while
+        a read() is still running.
+        """
+        camera = self.camera
+        try:
+            self._read_frames(camera)
+        finally:
+            camera.release()
+
+    def _read_frames(self, camera):
+        while self.running:
+            with self.lock:
+                buffer = self.free_buffers.pop() if self.free_buffers else None
+
+            with self.timer.stage("capture"):
+                if buffer is None:
+                    ret, frame = camera.read()
+                else:
+                    ret, frame = camera.read(image=buffer)
+            captured_at = time.time()
+
+            with self.lock:
+                if not ret:
+                    if buffer is not None:
+                        self.free_buffers.append(buffer)
+                    self.running = False
+                    self.frame_ready.notify_all()
+                    break
+
+                if frame is not buffer:
+                    # First frames, or the camera changed resolution
+                    self.frame_allocations += 1
+
+                if len(self.frames) == self.frames.maxlen:
+                    # Oldest frame is overwritten before anyone processed it
+                    old_frame, _ = self.frames.popleft()
+                    self.free_buffers.append(old_frame)
+                    self.frames_dropped += 1
+                self.frames.append((frame, captured_at))
+                self.frames_captured += 1
+                self.frame_ready.notify()
+
+    def read_latest(self, timeout=1.0):
+        """
+        Take the newest frame and discard anything older.
+        Returns: (frame, captured_at) or (None, None) if no frame arrived in time
+        """
+        with self.frame_ready:
+            if not self.frames and self.running:
+                self.frame_ready.wait(timeout)
+
+            if not self.frames:
+                return None, None
+
+            # The previously returned frame is no longer in use
+            if self.held is not None:
+                self.free_buffers.append(self.held)
+                self.held = None
+
+            frame, captured_at = self.frames.pop()
+            self.frames_dropped += len(self.frames)
+            for old_frame, _ in self.frames:
+                self.free_buffers.append(old_frame)
+            self.frames.clear()
+            self.frames_taken += 1
+            self.held = frame
+            return frame, captured_at
+
+    def stop(self):
+        """Stop the capture thread, which releases the camera"""
+        with self.lock:
+            self.running = False
+            self.frame_ready.notify_all()
+
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+            if self.thread.is_alive():
+                # Still blocked in read(); it releases the camera once that returns
+                print("Warning: camera read did not return; the camera is released when it does")
+            self.thread = None
+        elif self.camera is not None:
+            self.camera.release()
+        self.camera = None
+
+    def get_stats(self):
+        """Return capture counters"""
+        with self.lock:
+            return {
+                "frames_captured": self.frames_captured,
+                "frames_taken": self.frames_taken,
+                "frames_dropped": self.frames_dropped,
+                "frame_allocations": self.frame_allocations,
+            }
@@ -0,0 +1,141 @@
+import cv2
+import numpy as np
+
+
+class KeyframeDetector:
+    """
+    Run the Haar cascade only on keyframes and carry face boxes forward
+    between them with sparse Lucas-Kanade optical flow.
+
+    A keyframe is taken every `keyframe_interval` frames, or immediately when
+    the fraction of flow points that survived for any box drops below
+    `min_track_ratio` (tracking confidence lost).
+    """
+
+    def __init__(self, face_recognizer, keyframe_interval=5, min_track_ratio=0.5, points_per_box=10):
+        self.face_recognizer = face_recognizer
+        self.keyframe_interval = max(1, int(keyframe_interval))
+        self.min_track_ratio = min_track_ratio
+        self.points_per_box = points_per_box
+
+        self.lk_params = dict(
+            winSize=(15, 15),
+            maxLevel=2,
+            criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03),
+        )
+
+        self.prev_gray = None
+        # Own double-buffered gray frames: prev_gray must survive other users of
+        # the recognizer's reused buffers (e.g. other cameras sharing it)
+        self._gray_buffers = [None, None]
+        self._gray_index = 0
+        self.boxes = []
+        self.box_points = []
+        self.frames_since_keyframe = 0
+
+        # Statistics
+        self.keyframes = 0
+        self.propagated_frames = 0
+
+    def get_faces_from_image(self, image):
+        """Same contract as FaceRecognizer.get_faces_from_image: returns (faces, gray)"""
+        if self.prev_gray is None or self.frames_since_keyframe >= self.keyframe_interval:
+            return self._detect(image)
+
+        try:
+            gray = self._next_buffer(image.shape[:2])
+            cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=gray)
+            boxes = self._propagate(gray)
+        except Exception as e:
+            print(f"Error propagating faces: {str(e)}")
+            boxes = None
+
+        if boxes is None:
+            # Tracking confidence dropped; re-detect on this frame
+            return self._detect(image)
+
+        self.propagated_frames += 1
+        self.frames_since_keyframe += 1
+        self.prev_gray = gray
+        self.boxes = boxes
+        return boxes, gray
+
+    def _next_buffer(self, shape):
+        self._gray_index ^= 1
+        buffer = self._gray_buffers[self._gray_index]
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=np.uint8)
+            self._gray_buffers[self._gray_index] = buffer
+        return buffer
+
+    def _detect(self, image):
+        faces, gray = self.face_recognizer.get_faces_from_image(image)
+        self.keyframes += 1
+        self.frames_since_keyframe = 1
+        if gray is not None:
+            kept = self._next_buffer(gray.shape)
+            np.copyto(kept, gray)
+            gray = kept
+        self.prev_gray = gray
+        self.boxes = [tuple(int(v) for v in f) for f in faces]
+        self.box_points = [self._seed_points(gray, box) for box in self.boxes] if gray is not None else []
+        return faces, gray
+
+    def _seed_points(self, gray, box):
+        """Pick a few good corners inside a face box to follow"""
+        x, y, w, h = box
+        x0, y0 = max(0, x), max(0, y)
+        # Search the box only: a full-frame mask costs a full-frame corner pass per face
+        roi = gray[y0:y + h, x0:x + w]
+        if roi.size == 0:
+            return np.empty((0, 1, 2), dtype=np.float32)
+        points = cv2.goodFeaturesToTrack(
+            roi, maxCorners=self.points_per_box, qualityLevel=0.01,
+            minDistance=max(3, w // 10)
+        )
+        if points is None:
+            return np.empty((0, 1, 2), dtype=np.float32)
+        return points.astype(np.float32) + np.array([x0, y0], dtype=np.float32)
+
+    def _propagate(self, gray):
+        """
+        Shift each box by the median flow of its points.
+        Returns: list of boxes, or None when a keyframe is needed
+        """
+        if not self.boxes:
+            return []
+
+        height, width = gray.shape[:2]
+        new_boxes = []
+        new_points = []
+        for box, points in zip(self.boxes, self.box_points):
+            if len(points) == 0:
+                return None
+
+            moved, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, points, None, **self.lk_params)
+            if moved is None:
+                return None
+
+            good = status.reshape(-1) == 1
+            if good.sum() < max(1, self.min_track_ratio * len(points)):
+                return None
+
+            shift = np.median((moved[good] - points[good]).reshape(-1, 2), axis=0)
+            x, y, w, h = box
+            nx = int(round(x + shift[0]))
+            ny = int(round(y + shift[1]))
+            if nx < 0 or ny < 0 or nx + w > width or ny + h > height:
+                # Face is leaving the frame
+                return None
+
+            new_boxes.append((nx, ny, w, h))
+            new_points.append(moved[good].reshape(-1, 1, 2))
+
+        self.box_points = new_points
+        return new_boxes
+
+    def get_stats(self):
+        return {
+            "keyframes": self.keyframes,
+            "propagated_frames": self.propagated_frames,
+        }
@@ -0,0 +1,284 @@
+import copy
+import os
+
+import numpy as np
+from backend.lbph_numpy import RADIUS, NEIGHBORS, GRID_X, GRID_Y, spatial_histogram, NumpyLBPHRecognizer
+
+def chi_square_rows(query, histograms):
+    """Exact HISTCMP_CHISQR_ALT distance of one raw histogram to a few others"""
+    total = query + histograms
+    diff = query - histograms
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terms = np.where(total > 0, diff * diff / total, 0.0)
+    return 2.0 * terms.sum(axis=1, dtype=np.float64)
+
+
+def _calibration_terms(distances, residuals):
+    """
+    Regressors of the chi-square distance: the distance inside the subspace
+    and the query's residual outside it. An unknown face differs from every
+    student mostly outside the subspace learned from enrolled students.
+    """
+    residuals = np.sqrt(residuals)
+    return np.column_stack([np.ones_like(distances), distances, distances ** 2, residuals, residuals ** 2])
+
+
+class CompressedLBPHRecognizer:
+    """
+    LBPH recognizer matching in a learned low-dimensional feature space.
+
+    Training histograms are square-rooted (so Euclidean distance tracks the
+    chi-square distance LBPH uses), centered and projected onto `dimensions`
+    PCA components. Only the projected float32 features are kept, so the
+    model is over a hundred times smaller than the raw 16,384-bin
+    histograms and nearest neighbours are found with one matrix product
+    per batch.
+
+    Confidences are mapped back onto the chi-square scale by a regression
+    fitted at training time on exact distances of held-out samples, so the
+    attendance threshold keeps its meaning. Same API as
+    NumpyLBPHRecognizer; stored as .pca.npz.
+
+    A model with fewer than `min_samples` samples (a class-sized shard) is
+    not compressed: the subspace learned from so few samples loses too
+    much to rank students correctly, and the PCA basis alone is as large
+    as the raw histograms. Such models keep raw histograms and match
+    exactly like NumpyLBPHRecognizer.
+    """
+
+    def __init__(self, dimensions=128, seed=0, min_samples=2000):
+        self.dimensions = dimensions
+        self.seed = seed
+        self.min_samples = min_samples
+        # NumpyLBPHRecognizer holding the raw histograms of an uncompressed model
+        self.raw = None
+        self.mean = None
+        self.basis = None
+        self.features = np.empty((0, dimensions), dtype=np.float32)
+        self.norms = np.empty(0, dtype=np.float32)
+        self.labels = np.empty(0, dtype=np.int32)
+        # chi-square ~ calibration . _calibration_terms(distance, residual); the
+        # default (chi-square ~ 3x squared Hellinger distance) is used until fitted
+        self.calibration = np.array([0.0, 0.0, 3.0, 0.0, 3.0])
+        # (min distance, max distance, min residual, max residual) seen by the
+        # calibration; predictions are clamped to it instead of extrapolating
+        self.calibration_range = None
+
+    @classmethod
+    def from_cv2(cls, recognizer, **kwargs):
+        """Compress the histograms of a trained cv2 LBPH recognizer"""
+        model = cls(**kwargs)
+        histograms = recognizer.getHistograms()
+        if histograms:
+            model.fit(
+                np.vstack([np.asarray(h, dtype=np.float32).reshape(1, -1) for h in histograms]),
+                np.asarray(recognizer.getLabels(), dtype=np.int32).reshape(-1),
+            )
+        return model
+
+    def train(self, faces, labels):
+        self.fit(np.vstack([spatial_histogram(face) for face in faces]), labels)
+
+    def fit(self, histograms, labels, probes=200, max_fit_samples=20000):
+        """
+        Learn the projection and calibration from raw histograms (N, D)
+        `probes` samples are left out of the PCA fit and used for calibration,
+        so they sit outside the subspace like a live crop does. The PCA is
+        fitted on at most `max_fit_samples` random samples.
+        """
+        labels = np.asarray(labels, dtype=np.int32).reshape(-1)
+        if len(histograms) < self.min_samples:
+            raw = NumpyLBPHRecognizer()
+            raw.histograms = np.ascontiguousarray(histograms, dtype=np.float32)
+            raw.labels = labels
+            raw._reset_indexes()
+            self.raw = raw
+            self.mean = self.basis = None
+            self.features = self.features[:0]
+            self.norms = self.norms[:0]
+            self.labels = labels
+            return
+        self.raw = None
+        rng = np.random.default_rng(self.seed)
+        count = len(histograms)
+        held_out = rng.choice(count, size=min(probes, count // 5), replace=False)
+        fitted = np.ones(count, dtype=bool)
+        fitted[held_out] = False
+        if fitted.sum() > max_fit_samples:
+            fitted[rng.choice(np.flatnonzero(fitted), size=int(fitted.sum()) - max_fit_samples, replace=False)] = False
+
+        roots = np.sqrt(histograms, dtype=np.float32)
+        self.mean = roots[fitted].mean(axis=0)
+        centered = roots - self.mean
+        dimensions = min(self.dimensions, int(fitted.sum()), centered.shape[1])
+        self.basis = self._principal_axes(centered[fitted], dimensions)
+        self.features = np.ascontiguousarray(centered @ self.basis, dtype=np.float32)
+        self.norms = np.einsum("ij,ij->i", self.features, self.features)
+        self.labels = labels
+        residuals = np.einsum("ij,ij->i", centered, centered) - self.norms
+        self._calibrate(histograms, held_out, np.maximum(residuals, 0.0))
+
+    def update(self, faces, labels):
+        """
+        Add training samples projected onto the current basis; the basis and
+        calibration are only refitted by train. Arrays are replaced, not
+        modified in place, like NumpyLBPHRecognizer.update. An uncompressed
+        model stays uncompressed until it is trained again.
+        """
+        self.add_histograms(np.vstack([spatial_histogram(face) for face in faces]), labels)
+
+    def add_histograms(self, histograms, labels):
+        """update() for samples already encoded as spatial histograms (N, D)"""
+        histograms = np.asarray(histograms, dtype=np.float32)
+        if self.raw is not None:
+            self.raw = copy.copy(self.raw)
+            self.raw.add_histograms(histograms, labels)
+            self.labels = self.raw.getLabels().reshape(-1)
+            return
+        if self.basis is None:
+            return self.fit(histograms, labels)
+        features, _ = self._project_histograms(histograms)
+        features = features.astype(np.float32)
+        self.features = np.vstack([self.features, features])
+        self.norms = np.concatenate([self.norms, np.einsum("ij,ij->i", features, features)])
+        self.labels = np.concatenate([self.labels, np.asarray(labels, dtype=np.int32).reshape(-1)])
+
+    def remove(self, labels):
+        """Remove every sample of `labels`; returns the number of samples removed"""
+        if self.raw is not None:
+            self.raw = copy.copy(self.raw)
+            removed = self.raw.remove(labels)
+            self.labels = self.raw.getLabels().reshape(-1)
+            return removed
+        keep = ~np.isin(self.labels, list(labels))
+        removed = int(len(keep) - keep.sum())
+        if removed:
+            self.features = self.features[keep]
+            self.norms = self.norms[keep]
+            self.labels = self.labels[keep]
+        return removed
+
+    def _principal_axes(self, centered, dimensions, oversample=10, iterations=2):
+        """Top principal directions (D, dimensions) by randomized SVD"""
+        rng = np.random.default_rng(self.seed)
+        width = min(dimensions + oversample, *centered.shape)
+        sketch = centered @ rng.standard_normal((centered.shape[1], width)).astype(np.float32)
+        for _ in range(iterations):
+            sketch = centered @ (centered.T @ sketch)
+            sketch, _ = np.linalg.qr(sketch)
+        sketch, _ = np.linalg.qr(sketch)
+        _, _, vt = np.linalg.svd(sketch.T @ centered, full_matrices=False)
+        return np.ascontiguousarray(vt[:dimensions].T, dtype=np.float32)
+
+    def _calibrate(self, histograms, probes, residuals, neighbours=10):
+        """
+        Fit chi-square ~ _calibration_terms on exact distances from the probe
+        histograms to their nearest neighbours in the reduced space: once among
+        all samples (an enrolled student) and once without the probe's own
+        student (an unknown face), so the fit sees the same nearest-match
+        selection as live predictions
+        """
+        if len(probes) == 0:
+            return
+        terms, exact = [], []
+        for i in probes:
+            distances = self._distances(self.features[i:i + 1])[0]
+            distances[i] = np.inf
+            for candidates in (distances, np.where(self.labels == self.labels[i], np.inf, distances)):
+                nearest = np.argsort(candidates)[:neighbours]
+                nearest = nearest[np.isfinite(candidates[nearest])]
+                terms.append(_calibration_terms(candidates[nearest], np.full(len(nearest), residuals[i])))
+                exact.append(chi_square_rows(histograms[i], histograms[nearest]))
+        terms = np.vstack(terms)
+        self.calibration = np.linalg.lstsq(terms, np.concatenate(exact), rcond=None)[0]
+        self.calibration_range = np.array([terms[:, 1].min(), terms[:, 1].max(),
+                                           terms[:, 3].min() ** 2, terms[:, 3].max() ** 2])
+
+    def _project(self, faces):
+        """Return (features, residuals): projections and the squared length the projection drops"""
+        return self._project_histograms(np.vstack([spatial_histogram(face) for face in faces]))
+
+    def _project_histograms(self, histograms):
+        """_project for raw histograms (N, D)"""
+        centered = np.sqrt(histograms, dtype=np.float32) - self.mean
+        features = centered @ self.basis
+        residuals = np.einsum("ij,ij->i", centered, centered) - np.einsum("ij,ij->i", features, features)
+        return features, np.maximum(residuals, 0.0)
+
+    def _distances(self, queries):
+        """Euclidean distances (Q, N) in the reduced space"""
+        squared = (np.einsum("ij,ij->i", queries, queries)[:, None] + self.norms[None, :]
+                   - 2.0 * (queries @ self.features.T))
+        return np.sqrt(np.maximum(squared, 0.0))
+
+    def predict(self, face):
+        return self.predict_batch([face])[0]
+
+    def predict_batch(self, faces, top_k=None):
+        """
+        Return [(label, confidence)]; confidence is on the chi-square scale
+        top_k only applies to uncompressed models (see NumpyLBPHRecognizer)
+        """
+        if self.raw is not None:
+            return self.raw.predict_batch(faces, top_k=top_k)
+        if len(self.labels) == 0:
+            raise ValueError("Model is not trained")
+        features, residuals = self._project(faces)
+        distances = self._distances(features)
+        nearest = distances.argmin(axis=1)
+        best = distances[np.arange(len(nearest)), nearest]
+        if self.calibration_range is not None:
+            low, high, residual_low, residual_high = self.calibration_range
+            best = np.clip(best, low, high)
+            residuals = np.clip(residuals, residual_low, residual_high)
+        confidences = np.maximum(_calibration_terms(best, residuals) @ self.calibration, 0.0)
+        return [(int(label), float(conf)) for label, conf in zip(self.labels[nearest], confidences)]
+
+    def getLabels(self):
+        if self.raw is not None:
+            return self.raw.getLabels()
+        return self.labels.reshape(-1, 1)
+
+    def memory_bytes(self):
+        """Bytes held by the model arrays"""
+        if self.raw is not None:
+            inverse, sums = self.raw._search_index()
+            return self.raw.histograms.nbytes + self.raw.labels.nbytes + inverse.nbytes + sums.nbytes
+        return sum(a.nbytes for a in (self.mean, self.basis, self.features, self.norms, self.labels) if a is not None)
+
+    def save(self, path):
+        if self.raw is not None:
+            # Same layout as a NumpyLBPHRecognizer model; read tells them apart
+            self.raw.save(path)
+            return
+        with open(path, "wb") as f:
+            np.savez(f, mean=self.mean, basis=self.basis, features=self.features, labels=self.labels,
+                     calibration=self.calibration,
+                     calibration_range=self.calibration_range if self.calibration_range is not None else np.empty(0),
+                     params=np.array([RADIUS, NEIGHBORS, GRID_X, GRID_Y], dtype=np.int32))
+
+    def read(self, path):
+        with np.load(path) as data:
+            params = tuple(int(v) for v in data["params"])
+            if params != (RADIUS, NEIGHBORS, GRID_X, GRID_Y):
+                raise ValueError(f"Unsupported LBPH parameters {params} in {os.path.basename(path)}")
+            if "histograms" in data:
+                raw = NumpyLBPHRecognizer()
+                raw.read(path)
+                self.raw = raw
+                self.mean = self.basis = None
+                self.labels = raw.labels
+                return
+            self.raw = None
+            self.mean = data["mean"]
+            self.basis = data["basis"]
+            self.features = np.ascontiguousarray(data["features"], dtype=np.float32)
+            self.labels = data["labels"].astype(np.int32)
+            self.calibration = data["calibration"]
+            # Models saved before the range was recorded are not clamped
+            if "calibration_range" in data and data["calibration_range"].shape == (4,):
+                self.calibration_range = data["calibration_range"]
+            else:
+                self.calibration_range = None
+        self.dimensions = self.basis.shape[1]
+        self.norms = np.einsum("ij,ij->i", self.features, self.features)
@@ -0,0 +1,322 @@
+import math
+import os
+
+import numpy as np
+
+# Same parameters as cv2.face.LBPHFaceRecognizer_create() defaults
+RADIUS = 1
+NEIGHBORS = 8
+GRID_X = 8
+GRID_Y = 8
+
+_FLOAT_EPSILON = np.finfo(np.float32).eps
+
+
+def _neighbour_weights(radius, neighbors):
+    """Sampling offsets and bilinear weights, computed in float32 like OpenCV's elbp"""
+    samples = []
+    for n in range(neighbors):
+        x = np.float32(radius * math.cos(2.0 * math.pi * n / float(neighbors)))
+        y = np.float32(-radius * math.sin(2.0 * math.pi * n / float(neighbors)))
+        fx, fy = int(math.floor(x)), int(math.floor(y))
+        cx, cy = int(math.ceil(x)), int(math.ceil(y))
+        ty = np.float32(y - np.float32(fy))
+        tx = np.float32(x - np.float32(fx))
+        one = np.float32(1)
+        weights = ((one - tx) * (one - ty), tx * (one - ty), (one - tx) * ty, tx * ty)
+        samples.append(((fy, fx), (fy, cx), (cy, fx), (cy, cx), weights))
+    return samples
+
+
+_SAMPLES = _neighbour_weights(RADIUS, NEIGHBORS)
+
+
+def elbp(gray):
+    """Extended (circular) LBP codes of a gray image, bit-compatible with OpenCV"""
+    src = np.asarray(gray, dtype=np.float32)
+    rows, cols = src.shape
+    r = RADIUS
+    center = src[r:rows - r, r:cols - r]
+    codes = np.zeros(center.shape, dtype=np.uint8)
+
+    def shifted(dy, dx):
+        return src[r + dy:rows - r + dy, r + dx:cols - r + dx]
+
+    for n, (p1, p2, p3, p4, (w1, w2, w3, w4)) in enumerate(_SAMPLES):
+        t = w1 * shifted(*p1) + w2 * shifted(*p2) + w3 * shifted(*p3) + w4 * shifted(*p4)
+        bit = (t > center) | (np.abs(t - center) < _FLOAT_EPSILON)
+        codes |= bit.astype(np.uint8) << n
+    return codes
+
+
+def spatial_histogram(gray):
+    """
+    Concatenated per-cell LBP histograms of a face crop, each normalized by
+    the cell's pixel count (GRID_X x GRID_Y cells of 2**NEIGHBORS bins).
+    Returns: float32 vector
+    """
+    codes = elbp(gray)
+    bins = 1 << NEIGHBORS
+    cell_h = codes.shape[0] // GRID_Y
+    cell_w = codes.shape[1] // GRID_X
+    if cell_h == 0 or cell_w == 0:
+        raise ValueError("Face crop is too small for the LBP grid")
+
+    cells = codes[:cell_h * GRID_Y, :cell_w * GRID_X]
+    cells = cells.reshape(GRID_Y, cell_h, GRID_X, cell_w).transpose(0, 2, 1, 3)
+    cells = cells.reshape(GRID_Y * GRID_X, cell_h * cell_w).astype(np.int64)
+    cells += np.arange(GRID_Y * GRID_X, dtype=np.int64)[:, None] * bins
+
+    hist = np.bincount(cells.ravel(), minlength=GRID_Y * GRID_X * bins).astype(np.float32)
+    hist /= np.float32(cell_h * cell_w)
+    return hist
+
+
+def inverse_columns(histograms):
+    """
+    Bin-major reciprocals of training histograms, the layout chi_square_distances
+    scans: (D, N) float32 with 1/h, and inf for empty bins.
+    """
+    with np.errstate(divide="ignore"):
+        return np.ascontiguousarray((1.0 / histograms).T, dtype=np.float32)
+
+
+def chi_square_distances(queries, inverse, sums, chunk_bytes=256 << 10):
+    """
+    OpenCV's HISTCMP_CHISQR_ALT distance of every query to every training histogram.
+
+    2 * sum((a - b)^2 / (a + b)) = 2 * (sum a + sum b - 4 * sum(1 / (1/a + 1/b))),
+    and the last sum only has terms where both bins are non-empty. So for each
+    query only its non-empty bins are visited (about a quarter of them for
+    a face crop), reading whole rows of the bin-major `inverse` matrix in
+    cache-sized blocks of `chunk_bytes`.
+    queries: (Q, D) float32, inverse: (D, N) from inverse_columns, sums: (N,) row sums
+    Returns: (Q, N) float64
+    """
+    queries = np.atleast_2d(queries)
+    count = inverse.shape[1]
+    distances = np.empty((len(queries), count), dtype=np.float64)
+    if count == 0:
+        return distances
+
+    block_rows = max(1, chunk_bytes // (4 * count))
+    block = np.empty((block_rows, count), dtype=np.float32)
+    shared = np.empty(count, dtype=np.float64)
+    for i, query in enumerate(queries):
+        bins = np.flatnonzero(query)
+        inverse_query = (1.0 / query[bins]).astype(np.float32)
+        shared.fill(0.0)
+        for start in range(0, len(bins), block_rows):
+            rows = block[:len(bins[start:start + block_rows])]
+            np.take(inverse, bins[start:start + block_rows], axis=0, out=rows)
+            rows += inverse_query[start:start + block_rows, None]
+            # 1 / (1/a + 1/b) = ab / (a + b); 1 / inf = 0 for empty training bins
+            np.reciprocal(rows, out=rows)
+            shared += rows.sum(axis=0, dtype=np.float64)
+        distances[i] = 2.0 * (sums + query.sum(dtype=np.float64) - 4.0 * shared)
+
+    # Identical histograms can come out a rounding error below zero
+    np.maximum(distances, 0.0, out=distances)
+    return distances
+
+
+def chi_square_to_columns(query, inverse, sums, columns):
+    """Like chi_square_distances for one query, restricted to a few training columns"""
+    bins = np.flatnonzero(query)
+    rows = inverse[np.ix_(bins, columns)]
+    rows += (1.0 / query[bins]).astype(np.float32)[:, None]
+    np.reciprocal(rows, out=rows)
+    shared = rows.sum(axis=0, dtype=np.float64)
+    return np.maximum(2.0 * (sums[columns] + query.sum(dtype=np.float64) - 4.0 * shared), 0.0)
+
+
+class NumpyLBPHRecognizer:
+    """
+    LBPH face recognizer in NumPy, a drop-in for cv2.face.LBPHFaceRecognizer.
+
+    All training histograms live in one contiguous float32 matrix; loading
+    or training also builds a bin-major reciprocal copy of it (same size
+    again) that predict_batch scans with vectorized NumPy operations instead of
+    one C++ loop per crop and training sample. Codes, histograms and
+    distances follow OpenCV's implementation, so labels and confidences
+    match the cv2 backend and the same confidence threshold applies.
+    Models are stored as .npz; an OpenCV model can be imported with from_cv2.
+
+    predict_batch(faces, top_k=k) uses a two-level search instead: crops are
+    first compared with one centroid histogram per student, then exactly
+    with the samples of the k nearest students only.
+
+    remove(labels) tombstones samples: their index columns stop matching
+    and they are compacted away once they are a quarter of the model, or
+    left out when the model is saved.
+    """
+
+    def __init__(self):
+        self.histograms = np.empty((0, GRID_X * GRID_Y * (1 << NEIGHBORS)), dtype=np.float32)
+        self.labels = np.empty(0, dtype=np.int32)
+        self._index = None
+        self._students = None
+        # Boolean mask of removed (tombstoned) samples, None if there are none
+        self._dead = None
+
+    def _search_index(self):
+        """(inverse, sums) for chi_square_distances"""
+        index = self._index
+        if index is None:
+            index = self._index = (inverse_columns(self.histograms), self.histograms.sum(axis=1, dtype=np.float64))
+        return index
+
+    def _student_index(self):
+        """
+        First pruning level, built on first use:
+        (order, starts, ends, centroid inverse, centroid sums) where
+        order[starts[i]:ends[i]] are the sample rows of the i-th student
+        """
+        students = self._students
+        if students is None:
+            order = np.argsort(self.labels, kind="stable")
+            if self._dead is not None:
+                order = order[~self._dead[order]]
+            _, starts = np.unique(self.labels[order], return_index=True)
+            ends = np.append(starts[1:], len(order))
+            centroids = np.add.reduceat(self.histograms[order], starts, axis=0)
+            centroids /= (ends - starts).astype(np.float32)[:, None]
+            students = self._students = (
+                order, starts, ends, inverse_columns(centroids), centroids.sum(axis=1, dtype=np.float64)
+            )
+        return students
+
+    @classmethod
+    def from_cv2(cls, recognizer):
+        """Copy the histograms and labels of a trained cv2 LBPH recognizer"""
+        model = cls()
+        histograms = recognizer.getHistograms()
+        if histograms:
+            model.histograms = np.ascontiguousarray(
+                np.vstack([np.asarray(h, dtype=np.float32).reshape(1, -1) for h in histograms])
+            )
+            model.labels = np.asarray(recognizer.getLabels(), dtype=np.int32).reshape(-1)
+            model._reset_indexes()
+        return model
+
+    def train(self, faces, labels):
+        histograms = [spatial_histogram(face) for face in faces]
+        self.histograms = np.ascontiguousarray(np.vstack(histograms)) if histograms else self.histograms[:0]
+        self.labels = np.asarray(labels, dtype=np.int32).reshape(-1)
+        self._reset_indexes()
+
+    def update(self, faces, labels):
+        """
+        Add training samples, keeping the existing ones
+        The arrays are replaced rather than modified in place, so a shallow copy
+        of a model in use can be updated safely.
+        """
+        self.add_histograms(np.vstack([spatial_histogram(face) for face in faces]), labels)
+
+    def add_histograms(self, histograms, labels):
+        """update() for samples already encoded as spatial histograms (N, D)"""
+        histograms = np.asarray(histograms, dtype=np.float32)
+        inverse, sums = self._search_index()
+        self.histograms = np.vstack([self.histograms, histograms])
+        self.labels = np.concatenate([self.labels, np.asarray(labels, dtype=np.int32).reshape(-1)])
+        if self._dead is not None:
+            self._dead = np.concatenate([self._dead, np.zeros(len(histograms), dtype=bool)])
+        # Extend the search index with the new columns instead of rebuilding it
+        self._index = (np.hstack([inverse, inverse_columns(histograms)]),
+                       np.concatenate([sums, histograms.sum(axis=1, dtype=np.float64)]))
+        self._students = None
+
+    def remove(self, labels):
+        """
+        Remove every sample of `labels`; returns the number of samples removed
+        Like update, this replaces arrays instead of modifying them.
+        """
+        dead = np.isin(self.labels, list(labels))
+        if self._dead is not None:
+            dead |= self._dead
+        removed = int(dead.sum()) - (0 if self._dead is None else int(self._dead.sum()))
+        if removed == 0:
+            return 0
+        # An infinite row sum makes every distance to the sample infinite
+        inverse, sums = self._search_index()
+        self._index = (inverse, np.where(dead, np.inf, sums))
+        self._dead = dead
+        self._students = None
+        if dead.mean() > 0.25:
+            self.compact()
+        return removed
+
+    def compact(self):
+        """Drop tombstoned samples from the arrays and the search index"""
+        if self._dead is None:
+            return
+        live = ~self._dead
+        inverse, sums = self._search_index()
+        self.histograms = np.ascontiguousarray(self.histograms[live])
+        self.labels = self.labels[live]
+        self._index = (np.ascontiguousarray(inverse[:, live]), sums[live])
+        self._dead = None
+        self._students = None
+
+    def _live_rows(self):
+        return slice(None) if self._dead is None else ~self._dead
+
+    def predict(self, face):
+        """Return (label, confidence) of the nearest training histogram"""
+        return self.predict_batch([face])[0]
+
+    def predict_batch(self, faces, top_k=None):
+        """
+        Return [(label, confidence)] for a list of face crops
+        top_k: only compare exactly against the samples of the top_k students
+        with the nearest centroid (None = every training sample)
+        """
+        if len(self.labels[self._live_rows()]) == 0:
+            raise ValueError("Model is not trained")
+        queries = np.vstack([spatial_histogram(face) for face in faces])
+
+        if top_k is not None and top_k < len(self._student_index()[1]):
+            return self._predict_pruned(queries, max(1, int(top_k)))
+
+        distances = chi_square_distances(queries, *self._search_index())
+        nearest = distances.argmin(axis=1)
+        rows = np.arange(len(nearest))
+        return [(int(label), float(conf)) for label, conf in zip(self.labels[nearest], distances[rows, nearest])]
+
+    def _predict_pruned(self, queries, top_k):
+        order, starts, ends, inverse, sums = self._student_index()
+        sample_inverse, sample_sums = self._search_index()
+        coarse = chi_square_distances(queries, inverse, sums)
+        results = []
+        for query, distances in zip(queries, coarse):
+            candidates = np.argpartition(distances, top_k - 1)[:top_k]
+            samples = np.concatenate([order[starts[c]:ends[c]] for c in candidates])
+            exact = chi_square_to_columns(query, sample_inverse, sample_sums, samples)
+            best = int(exact.argmin())
+            results.append((int(self.labels[samples[best]]), float(exact[best])))
+        return results
+
+    def _reset_indexes(self):
+        self._dead = None
+        self._students = None
+        self._index = None
+        self._search_index()
+
+    def getLabels(self):
+        return self.labels[self._live_rows()].reshape(-1, 1)
+
+    def save(self, path):
+        # Write through a file object: np.savez would append ".npz" to other names
+        with open(path, "wb") as f:
+            live = self._live_rows()
+            np.savez(f, histograms=self.histograms[live], labels=self.labels[live],
+                     params=np.array([RADIUS, NEIGHBORS, GRID_X, GRID_Y], dtype=np.int32))
+
+    def read(self, path):
+        with np.load(path) as data:
+            params = tuple(int(v) for v in data["params"])
+            if params != (RADIUS, NEIGHBORS, GRID_X, GRID_Y):
+                raise ValueError(f"Unsupported LBPH parameters {params} in {os.path.basename(path)}")
+            self.histograms = np.ascontiguousarray(data["histograms"], dtype=np.float32)
+            self.labels = data["labels"].astype(np.int32)
+        self._reset_indexes()
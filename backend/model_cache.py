@@ -0,0 +1,139 @@
+import os
+import threading
+
+import cv2
+import numpy as np
+from backend.lbph_numpy import NumpyLBPHRecognizer
+from backend.lbph_compressed import CompressedLBPHRecognizer
+
+
+def file_signature(path):
+    """(mtime_ns, size) of a file, or None if it does not exist"""
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+class ModelCache:
+    """
+    Process-wide cache of parsed LBPH models and Haar cascades.
+
+    Entries are keyed by absolute file path and reused for as long as the
+    file's modification time and size are unchanged, so opening another
+    attendance window or starting another session does not parse the same
+    model again. Cached recognizers are shared: callers must not train or
+    update them in place (train a new recognizer and store() it instead).
+    """
+
+    def __init__(self):
+        self.models = {}
+        self.cascades = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_model(self, path, cache=True):
+        """
+        Return (recognizer, labels) for the LBPH model at `path`
+        .pca.npz files load as CompressedLBPHRecognizer, other .npz files as
+        NumpyLBPHRecognizer and anything else as cv2 LBPH.
+        labels is a frozenset of the integer labels in the model.
+        cache=False still returns a cached entry, but does not keep a newly
+        parsed model (for files that are read once to be rewritten).
+        Returns (None, None) if the file does not exist.
+        """
+        signature = file_signature(path)
+        if signature is None:
+            return None, None
+
+        key = os.path.abspath(path)
+        with self.lock:
+            entry = self.models.get(key)
+            if entry is not None and entry[0] == signature:
+                self.hits += 1
+                return entry[1], entry[2]
+
+        # Parse outside the lock; a large model takes seconds to read
+        if path.endswith(".pca.npz"):
+            recognizer = CompressedLBPHRecognizer()
+        elif path.endswith(".npz"):
+            recognizer = NumpyLBPHRecognizer()
+        else:
+            recognizer = cv2.face.LBPHFaceRecognizer_create()
+        recognizer.read(path)
+        labels = model_labels(recognizer)
+        with self.lock:
+            if cache:
+                self.models[key] = (signature, recognizer, labels)
+            self.misses += 1
+        return recognizer, labels
+
+    def store(self, path, recognizer):
+        """Cache a recognizer that was just saved to `path`"""
+        signature = file_signature(path)
+        if signature is None:
+            return
+        with self.lock:
+            self.models[os.path.abspath(path)] = (signature, recognizer, model_labels(recognizer))
+
+    def refresh(self, path, recognizer):
+        """store() a rewritten model only if `path` was cached; otherwise just forget it"""
+        with self.lock:
+            cached = os.path.abspath(path) in self.models
+        if cached:
+            self.store(path, recognizer)
+
+    def get_cascade(self, path):
+        """Return a loaded CascadeClassifier for `path`, or None if missing or invalid"""
+        signature = file_signature(path)
+        if signature is None:
+            return None
+
+        key = os.path.abspath(path)
+        with self.lock:
+            entry = self.cascades.get(key)
+            if entry is not None and entry[0] == signature:
+                self.hits += 1
+                return entry[1]
+
+        cascade = cv2.CascadeClassifier(path)
+        if cascade.empty():
+            return None
+        with self.lock:
+            self.cascades[key] = (signature, cascade)
+            self.misses += 1
+        return cascade
+
+    def invalidate(self, path=None):
+        """Forget one cached file, or everything when `path` is None"""
+        with self.lock:
+            if path is None:
+                self.models.clear()
+                self.cascades.clear()
+                return
+            key = os.path.abspath(path)
+            self.models.pop(key, None)
+            self.cascades.pop(key, None)
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "cached_models": len(self.models),
+                "cached_cascades": len(self.cascades),
+                "cache_hits": self.hits,
+                "cache_misses": self.misses,
+            }
+
+
+def model_labels(recognizer):
+    """Set of integer labels stored in an LBPH recognizer"""
+    labels = recognizer.getLabels()
+    if labels is None:
+        return frozenset()
+    return frozenset(int(l) for l in np.asarray(labels).flatten())
+
+
+# Shared by every FaceRecognizer in the process
+MODEL_CACHE = ModelCache()
@@ -0,0 +1,131 @@
+import threading
+
+from backend.model_cache import file_signature
+
+
+class ModelWatcher:
+    """
+    Pick up a retrained model while a session is running.
+
+    A background thread polls the loaded model file, the .yml it is
+    converted from (numpy and pca backends), the update segments
+    registration adds to it and the student registry. When any of them changes (and has stayed unchanged for one more
+    poll, so half-written files are skipped) the new model and roster are
+    loaded on that thread, converting a newer .yml there too. The frame loop calls apply_pending() between
+    frames, which only swaps references, so recognition never pauses and
+    the model and roster always change together.
+    """
+
+    def __init__(self, face_recognizer, roster_index, interval=2.0):
+        self.face_recognizer = face_recognizer
+        self.roster_index = roster_index
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.pending = None
+
+        # Signatures of the files currently in use, and of the last change seen
+        self.applied = None
+        self.candidate = None
+
+        # Statistics
+        self.reloads = 0
+        self.reload_errors = 0
+
+    def _signatures(self):
+        model_file = self.face_recognizer.loaded_model_path
+        source = self.face_recognizer.model_source(model_file)
+        return (
+            file_signature(model_file),
+            file_signature(source),
+            # A directory's mtime changes when a segment is added or merged
+            file_signature(self.face_recognizer.segment_dir(source)),
+            file_signature(self.roster_index.student_details_path),
+        )
+
+    def start(self):
+        """Start watching the model currently loaded in the recognizer"""
+        if self.face_recognizer.loaded_model_path is None:
+            return False
+        self.applied = self._signatures()
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._watch_loop, name="ModelWatcher", daemon=True)
+        self.thread.start()
+        return True
+
+    def _watch_loop(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self._check()
+            except Exception as e:
+                self.reload_errors += 1
+                print(f"Error reloading model: {str(e)}")
+
+    def _check(self):
+        signatures = self._signatures()
+        if signatures == self.applied or (signatures[0] is None and signatures[1] is None):
+            self.candidate = None
+            return
+        if signatures != self.candidate:
+            # Changed since the last poll; wait until the writer is done
+            self.candidate = signatures
+            return
+
+        roster_signature = signatures[3]
+        recognizer = None
+        model_signatures = signatures[:3]
+        if model_signatures != self.applied[:3]:
+            model_file = self.face_recognizer.loaded_model_path
+            # Merges update segments and converts a retrained .yml for the
+            # numpy/pca backends, which rewrites the model files
+            recognizer, _ = self.face_recognizer._get_cached_model(self.face_recognizer.model_source(model_file))
+            model_signatures = self._signatures()[:3]
+        entries = None
+        if roster_signature != self.applied[3]:
+            entries, roster_signature = self.roster_index.load()
+
+        with self.lock:
+            self.pending = (recognizer, entries, roster_signature)
+        self.applied = model_signatures + (roster_signature,)
+        self.candidate = None
+
+    def apply_pending(self, session=None):
+        """
+        Swap in a model/roster loaded in the background. Call between frames.
+        `session` (AttendanceSession) gets its expected students refreshed.
+        Returns True if anything was swapped.
+        """
+        if self.pending is None:
+            return False
+        with self.lock:
+            pending, self.pending = self.pending, None
+        if pending is None:
+            return False
+
+        recognizer, entries, roster_signature = pending
+        if recognizer is not None:
+            self.face_recognizer.recognizer = recognizer
+            if self.face_recognizer.recognition_pool is not None:
+                # Pool workers still hold the old model; predict in-process from now on
+                self.face_recognizer.recognition_pool = None
+        if entries is not None:
+            self.roster_index.swap(entries, roster_signature)
+        if session is not None:
+            session.refresh_expected()
+
+        self.reloads += 1
+        print(f"✓ Model reloaded during session ({len(self.roster_index)} students)")
+        return True
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+
+    def get_stats(self):
+        return {
+            "model_reloads": self.reloads,
+            "model_reload_errors": self.reload_errors,
+        }
@@ -0,0 +1,50 @@
+import cv2
+
+
+class MotionGate:
+    """
+    Cheap frame differencing on a downsampled gray frame to tell whether
+    anything changed since the previous frame.
+
+    threshold: per-pixel intensity change that counts as changed (0-255)
+    min_changed_ratio: fraction of changed pixels needed to report motion
+    max_static_frames: force a full pass after this many skipped frames
+    """
+
+    def __init__(self, threshold=25, min_changed_ratio=0.002, width=160, max_static_frames=30):
+        self.threshold = threshold
+        self.min_changed_ratio = min_changed_ratio
+        self.width = width
+        self.max_static_frames = max_static_frames
+        self.previous = None
+        self.static_run = 0
+
+    def has_motion(self, frame):
+        """Return True if the frame differs enough from the previous one"""
+        height, width = frame.shape[:2]
+        small_height = max(1, int(height * self.width / width))
+        small = cv2.resize(frame, (self.width, small_height), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        small = cv2.GaussianBlur(small, (5, 5), 0)
+
+        previous = self.previous
+        self.previous = small
+        if previous is None or previous.shape != small.shape:
+            self.static_run = 0
+            return True
+
+        diff = cv2.absdiff(small, previous)
+        _, mask = cv2.threshold(diff, self.threshold, 255, cv2.THRESH_BINARY)
+        changed = cv2.countNonZero(mask) / float(mask.size)
+
+        if changed >= self.min_changed_ratio or self.static_run >= self.max_static_frames:
+            self.static_run = 0
+            return True
+
+        self.static_run += 1
+        return False
+
+    def reset(self):
+        self.previous = None
+        self.static_run = 0
@@ -0,0 +1,82 @@
+import multiprocessing
+import os
+
+import cv2
+from backend.segmented_model import SegmentedRecognizer
+
+# Per-process recognizer, loaded once by the pool initializer
+_worker_recognizer = None
+
+
+def _init_worker(model_path, segments):
+    global _worker_recognizer
+    parts = []
+    for path in [model_path] + list(segments):
+        part = cv2.face.LBPHFaceRecognizer_create()
+        part.read(path)
+        parts.append(part)
+    _worker_recognizer = parts[0] if len(parts) == 1 else SegmentedRecognizer(parts)
+
+
+def _predict_chunk(crops):
+    results = []
+    for crop in crops:
+        try:
+            label, conf = _worker_recognizer.predict(crop)
+            results.append((label, conf))
+        except Exception as e:
+            print(f"Error predicting face in worker: {str(e)}")
+            results.append((None, None))
+    return results
+
+
+class RecognitionPool:
+    """
+    Worker processes that each load the LBPH model once and predict batches
+    of face crops. Results come back in input order and match the serial
+    FaceRecognizer.predict_face path.
+    """
+
+    def __init__(self, model_path, workers=None, min_batch=4, segments=()):
+        """segments: update segment files registered since the model was saved"""
+        self.model_path = model_path
+        self.segments = list(segments)
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        # Smaller batches are predicted in-process; IPC would cost more than it saves
+        self.min_batch = min_batch
+        self.pool = None
+
+    def start(self):
+        """Spawn the workers. Returns True on success"""
+        try:
+            if not os.path.exists(self.model_path):
+                print(f"Model not found at {self.model_path}")
+                return False
+            ctx = multiprocessing.get_context("spawn")
+            self.pool = ctx.Pool(self.workers, initializer=_init_worker, initargs=(self.model_path, self.segments))
+            print(f"✓ Recognition pool started with {self.workers} workers")
+            return True
+        except Exception as e:
+            print(f"Error starting recognition pool: {str(e)}")
+            self.pool = None
+            return False
+
+    def predict_batch(self, crops):
+        """Predict a list of face crops. Returns: list of (label, confidence)"""
+        if not crops:
+            return []
+
+        # Contiguous chunks, one per worker, keep result order simple
+        chunk_size = -(-len(crops) // self.workers)
+        chunks = [crops[i:i + chunk_size] for i in range(0, len(crops), chunk_size)]
+        results = []
+        for chunk_result in self.pool.map(_predict_chunk, chunks):
+            results.extend(chunk_result)
+        return results
+
+    def stop(self):
+        """Shut the workers down"""
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
@@ -0,0 +1,98 @@
+import os
+import threading
+import pandas as pd
+from backend.model_cache import file_signature
+
+
+def normalize_enrollment(enrollment_id):
+    """Convert an enrollment ID like 0123-0263 to the integer LBPH label 1230263"""
+    return int(str(enrollment_id).replace("-", ""))
+
+
+class RosterIndex:
+    """
+    Lookup table from integer LBPH label to (enrollment, name, subjects).
+
+    Built once from studentdetails.csv and rebuilt only when the file's
+    modification time or size changes.
+    """
+
+    def __init__(self, student_details_path):
+        self.student_details_path = student_details_path
+        self.entries = {}
+        self.signature = None
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        """Rebuild the index if the student registry changed. Returns True if rebuilt"""
+        signature = file_signature(self.student_details_path)
+        with self.lock:
+            if signature is not None and signature == self.signature:
+                return False
+            self.entries = self._build()
+            self.signature = signature
+            return True
+
+    def load(self):
+        """Read the registry without touching the live index. Returns (entries, signature)"""
+        signature = file_signature(self.student_details_path)
+        return self._build(), signature
+
+    def swap(self, entries, signature):
+        """Replace the live index with entries returned by load()"""
+        with self.lock:
+            self.entries = entries
+            self.signature = signature
+
+    def _build(self):
+        entries = {}
+        if not os.path.exists(self.student_details_path):
+            return entries
+
+        try:
+            df = pd.read_csv(self.student_details_path, dtype={"Enrollment": str})
+        except Exception as e:
+            print(f"Error reading student details: {str(e)}")
+            return entries
+
+        has_subjects = "Subjects" in df.columns
+        for row in df.itertuples(index=False):
+            try:
+                label = normalize_enrollment(row.Enrollment)
+            except (TypeError, ValueError):
+                print(f"Warning: Skipping invalid enrollment ID {row.Enrollment}")
+                continue
+
+            subjects_str = row.Subjects if has_subjects else ""
+            if pd.isna(subjects_str) or subjects_str == "":
+                subjects = ()
+            else:
+                subjects = tuple(s.strip() for s in str(subjects_str).split(";") if s.strip())
+
+            # Keep the first occurrence, matching the previous DataFrame lookup
+            if label not in entries:
+                entries[label] = (str(row.Enrollment), row.Name, subjects)
+        return entries
+
+    def lookup(self, label):
+        """Return (enrollment, name, subjects) for an LBPH label, or None"""
+        try:
+            return self.entries.get(int(label))
+        except (TypeError, ValueError):
+            return None
+
+    def expected_for_subject(self, subject):
+        """Return the set of labels of students enrolled in `subject`"""
+        subject = str(subject).strip()
+        return {label for label, (_, _, subjects) in self.entries.items() if subject in subjects}
+
+    def labels_by_subject(self):
+        """Return {subject: set of labels} for every subject with enrolled students"""
+        result = {}
+        for label, (_, _, subjects) in self.entries.items():
+            for subject in subjects:
+                result.setdefault(subject, set()).add(label)
+        return result
+
+    def __len__(self):
+        return len(self.entries)
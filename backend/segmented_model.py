@@ -0,0 +1,38 @@
+import numpy as np
+
+
+class SegmentedRecognizer:
+    """
+    A saved LBPH model plus the update segments registered since, searched
+    together without merging them into one model.
+
+    LBPH answers with the nearest training sample, so the nearest match
+    over all parts is the nearest match over all samples: labels and
+    confidences are those of one model trained on everything. Parts are
+    cv2 LBPH recognizers or NumpyLBPHRecognizer/CompressedLBPHRecognizer.
+    """
+
+    def __init__(self, parts):
+        self.parts = list(parts)
+
+    def predict(self, face):
+        """Return (label, confidence) of the nearest sample over every part"""
+        return min((part.predict(face) for part in self.parts), key=lambda result: result[1])
+
+    def predict_batch(self, faces, top_k=None):
+        """
+        Return [(label, confidence)] for a list of face crops
+        top_k is passed on to parts that support it (see NumpyLBPHRecognizer)
+        """
+        best = None
+        for part in self.parts:
+            if hasattr(part, "predict_batch"):
+                results = part.predict_batch(faces, top_k=top_k)
+            else:
+                results = [part.predict(face) for face in faces]
+            best = results if best is None else [min(a, b, key=lambda result: result[1])
+                                                 for a, b in zip(best, results)]
+        return best
+
+    def getLabels(self):
+        return np.vstack([np.asarray(part.getLabels(), dtype=np.int32).reshape(-1, 1) for part in self.parts])
@@ -0,0 +1,173 @@
+import time
+
+import cv2
+
+from backend.attendance_session import AttendanceSession
+from backend.frame_capture import FrameGrabber
+from backend.keyframe_detector import KeyframeDetector
+
+
+class CameraStream:
+    """One frame source bound to a subject"""
+
+    def __init__(self, name, source, subject, grabber, session):
+        self.name = name
+        self.source = source
+        self.subject = subject
+        self.grabber = grabber
+        self.session = session
+        self.busy_time = 0.0
+
+
+class MultiCameraSessionManager:
+    """
+    Run several cameras in one process, each bound to a subject.
+
+    All streams share one loaded FaceRecognizer and one RosterIndex. Frames
+    are processed by a single scheduler that always serves the ready stream
+    with the least accumulated processing time, so a busy camera cannot
+    starve the others. Streams for the same subject share one record list,
+    so a student seen by two cameras is only recorded once.
+    """
+
+    def __init__(self, face_recognizer, roster_index, attendance_handler, buffer_size=2, keyframe_interval=1):
+        self.face_recognizer = face_recognizer
+        self.roster_index = roster_index
+        self.attendance_handler = attendance_handler
+        self.buffer_size = buffer_size
+        self.keyframe_interval = keyframe_interval
+        self.streams = []
+        self.last_stats = {}
+        # subject -> [(enrollment, name)] not seen by any camera
+        self.last_absentees = {}
+
+    def add_source(self, source, subject, name=None):
+        """
+        Register a camera index or stream URL for a subject
+        Stream names key the per-camera stats, so a duplicate name raises ValueError.
+        """
+        name = name or f"camera-{source}"
+        if any(stream.name == name for stream in self.streams):
+            raise ValueError(f"Duplicate camera stream: {name}")
+        detector = None
+        if self.keyframe_interval > 1:
+            detector = KeyframeDetector(self.face_recognizer, self.keyframe_interval)
+        session = AttendanceSession(self.face_recognizer, self.attendance_handler, self.roster_index, subject,
+                                    detector=detector)
+
+        # Deduplicate recognitions within a subject across cameras
+        for stream in self.streams:
+            if stream.subject == subject:
+                session.share_records_with(stream.session)
+                break
+        else:
+            session.journal = self.attendance_handler.open_journal(subject)
+
+        grabber = FrameGrabber(source, buffer_size=self.buffer_size)
+        self.streams.append(CameraStream(name, source, subject, grabber, session))
+
+    def run(self, duration=20, stop_event=None, headless=False, watcher=None):
+        """
+        Run all streams until `duration` seconds pass, `stop_event` is set or ESC is pressed.
+        watcher (ModelWatcher) swaps in a retrained model and roster between frames.
+        Returns: dict of subject -> (success, student_count, message)
+        """
+        results = {}
+        try:
+            started = [s for s in self.streams if s.grabber.start()]
+            for stream in self.streams:
+                if stream not in started:
+                    print(f"Warning: camera {stream.name} not found")
+            if not started:
+                for stream in self.streams:
+                    if stream.session.journal is not None:
+                        stream.session.journal.discard()
+                return {s.subject: (False, 0, "Camera not found!") for s in self.streams}
+
+            start_time = time.time()
+            while True:
+                if stop_event is not None and stop_event.is_set():
+                    break
+                remaining = duration - int(time.time() - start_time)
+                if remaining <= 0:
+                    break
+                if not any(s.grabber.running for s in started):
+                    break
+                if all(s.session.roster_complete for s in started):
+                    print("✓ All enrolled students recognized, ending session early")
+                    break
+
+                if watcher is not None and watcher.apply_pending():
+                    for stream in started:
+                        stream.session.refresh_expected()
+
+                # Serve the ready stream that has used the least processing time
+                processed = False
+                for stream in sorted(started, key=lambda s: s.busy_time):
+                    frame, captured_at = stream.grabber.read_latest(timeout=0)
+                    if frame is None:
+                        continue
+
+                    t0 = time.perf_counter()
+                    detections = stream.session.process_frame(frame, captured_at)
+                    stream.busy_time += time.perf_counter() - t0
+
+                    if not headless:
+                        stream.session.draw_detections(frame, detections, remaining)
+                        cv2.imshow(f"Taking Attendance - {stream.name} ({stream.subject})", frame)
+                    processed = True
+                    break
+
+                if not headless:
+                    if cv2.waitKey(1) & 0xFF == 27:  # ESC key
+                        break
+                elif not processed:
+                    time.sleep(0.005)
+
+            self._collect_stats(time.time() - start_time)
+        except Exception as e:
+            print(f"Error in multi-camera session: {str(e)}")
+        finally:
+            for stream in self.streams:
+                stream.grabber.stop()
+            if not headless:
+                cv2.destroyAllWindows()
+
+        # One session file per subject
+        saved = set()
+        for stream in self.streams:
+            if stream.subject in saved:
+                continue
+            saved.add(stream.subject)
+            self.last_absentees[stream.subject] = stream.session.get_absentees()
+            journal = stream.session.journal
+            records = stream.session.attendance_records
+            if records:
+                if journal is not None and journal.count == len(records):
+                    filepath, msg = self.attendance_handler.finalize_journal(journal, stream.subject)
+                else:
+                    if journal is not None:
+                        journal.discard()
+                    filepath, msg = self.attendance_handler.save_attendance(records, stream.subject)
+                results[stream.subject] = (filepath is not None, len(stream.session.recognized_students), msg)
+            else:
+                if journal is not None:
+                    journal.discard()
+                results[stream.subject] = (False, 0, "No attendance recorded")
+        return results
+
+    def _collect_stats(self, elapsed):
+        stats = {}
+        for stream in self.streams:
+            camera_stats = {**stream.grabber.get_stats(), **stream.session.get_stats()}
+            camera_stats["subject"] = stream.subject
+            camera_stats["share_of_processing"] = 0.0
+            stats[stream.name] = camera_stats
+
+        total_busy = sum(s.busy_time for s in self.streams)
+        if total_busy > 0:
+            for stream in self.streams:
+                stats[stream.name]["share_of_processing"] = round(stream.busy_time / total_busy, 3)
+        stats["elapsed"] = round(elapsed, 2)
+        self.last_stats = stats
+        print(f"Multi-camera stats: {stats}")
@@ -0,0 +1,120 @@
+import json
+import os
+import time
+
+import numpy as np
+
+
+class _Stage:
+    __slots__ = ("timer", "name", "started")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.started
+        self.timer.record(self.name, duration)
+        if self.timer.tracer is not None:
+            self.timer.tracer.add_complete(self.name, self.started, duration, "stage")
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class StageTimer:
+    """
+    Per-stage timings of the attendance pipeline.
+
+    Each sample is one float appended to a list, cheap enough to leave on
+    in production. Percentiles are only computed when a summary is asked for.
+    """
+
+    def __init__(self, tracer=None):
+        self.samples = {}
+        # Optional TraceRecorder that also receives every stage as a timeline span
+        self.tracer = tracer
+
+    def stage(self, name):
+        """Context manager that times one occurrence of `name`"""
+        return _Stage(self, name)
+
+    def record(self, name, seconds):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = []
+        samples.append(seconds)
+
+    def summary(self):
+        """Return {stage: {count, total_ms, mean_ms, p50_ms, p90_ms, p99_ms, max_ms}}"""
+        result = {}
+        for name, samples in list(self.samples.items()):
+            if not samples:
+                continue
+            values = np.asarray(samples) * 1000
+            p50, p90, p99 = np.percentile(values, [50, 90, 99])
+            result[name] = {
+                "count": int(values.size),
+                "total_ms": round(float(values.sum()), 3),
+                "mean_ms": round(float(values.mean()), 3),
+                "p50_ms": round(float(p50), 3),
+                "p90_ms": round(float(p90), 3),
+                "p99_ms": round(float(p99), 3),
+                "max_ms": round(float(values.max()), 3),
+            }
+        return result
+
+    def save_summary(self, path, extra=None):
+        """Write the summary (plus optional session stats) as JSON. Returns path or None"""
+        try:
+            data = {"stages": self.summary()}
+            if extra:
+                data["session"] = extra
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(data, f, indent=2, default=str)
+            return path
+        except Exception as e:
+            print(f"Error saving timing summary: {str(e)}")
+            return None
+
+    def print_summary(self):
+        for name, s in self.summary().items():
+            print(f"  {name:<14} n={s['count']:<6} p50={s['p50_ms']:.2f}ms p90={s['p90_ms']:.2f}ms p99={s['p99_ms']:.2f}ms")
+
+
+class NullTimer:
+    """Drop-in StageTimer that records nothing"""
+
+    def stage(self, name):
+        return _NULL_STAGE
+
+    def record(self, name, seconds):
+        pass
+
+    def summary(self):
+        return {}
+
+
+NULL_TIMER = NullTimer()
+
+
+def timings_path_for(session_csv):
+    """Summary path next to a session CSV (JSON so it is not mistaken for a session file)"""
+    base, _ = os.path.splitext(session_csv)
+    return base + "_timings.json"
@@ -2,6 +2,7 @@ import csv
 import os
 import pandas as pd
 import re
+import shutil
 import cv2
 from PIL import Image
 
@@ -82,16 +83,46 @@ class StudentManager:
         except Exception as e:
             return None, False
     
-    def remove_student(self, enrollment_id):
-        """Remove a student"""
+    def remove_student(self, enrollment_id, training_path=None, face_recognizer=None):
+        """
+        Remove a student together with their ID photo and, when given, their
+        training images (training_path) and samples in the trained models
+        (face_recognizer, see FaceRecognizer.remove_labels)
+        Returns: (success, message, warnings), warnings listing what could not
+        be deleted although the student was removed
+        """
         try:
             df = pd.read_csv(self.student_details_path)
             df = df[df["Enrollment"] != enrollment_id]
             df.to_csv(self.student_details_path, index=False)
             
-            return True, "Student removed successfully"
+            warnings = []
+            if training_path:
+                student_dir = os.path.join(training_path, str(enrollment_id))
+                if os.path.isdir(student_dir):
+                    try:
+                        shutil.rmtree(student_dir)
+                    except Exception as e:
+                        warnings.append(f"training images not deleted: {str(e)}")
+            
+            ok, msg = self.delete_id_photo(enrollment_id)
+            if not ok and msg != "No ID photo found":
+                warnings.append(msg)
+            
+            if face_recognizer is not None:
+                try:
+                    _, failed = face_recognizer.remove_labels([int(str(enrollment_id).replace("-", ""))])
+                    if failed:
+                        names = ", ".join(os.path.relpath(f, os.path.dirname(face_recognizer.model_path)) for f in failed)
+                        warnings.append(f"face data still in model files: {names}")
+                except Exception as e:
+                    warnings.append(f"model not updated: {str(e)}")
+            
+            if warnings:
+                return True, "Student removed with warnings: " + "; ".join(warnings), warnings
+            return True, "Student removed successfully", []
         except Exception as e:
-            return False, f"Error removing student: {str(e)}"
+            return False, f"Error removing student: {str(e)}", []
     
     def reset_all_students(self):
         """Reset all student data"""
@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+import time
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "cat", "args", "started")
+
+    def __init__(self, recorder, name, cat, args):
+        self.recorder = recorder
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.recorder.add_complete(self.name, self.started, time.perf_counter() - self.started, self.cat, self.args)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class TraceRecorder:
+    """
+    Collect a Chrome trace-event timeline (chrome://tracing, Perfetto).
+
+    Spans are stored as complete ("X") events tagged with the recording
+    thread, so the capture thread, the frame loop and blocking calls such
+    as file writes or text-to-speech show up on separate tracks.
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.events = []
+        self.threads = {}
+        self.lock = threading.Lock()
+
+    def span(self, name, cat="attendance", args=None):
+        """Context manager recording one span on the calling thread"""
+        return _Span(self, name, cat, args)
+
+    def add_complete(self, name, started, duration, cat="attendance", args=None):
+        """Add a span given its perf_counter start time and duration in seconds"""
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": round((started - self.origin) * 1e6, 1),
+            "dur": round(duration * 1e6, 1),
+            "pid": self.pid,
+            "tid": thread.ident,
+        }
+        if args:
+            event["args"] = args
+        with self.lock:
+            self.events.append(event)
+            if thread.ident not in self.threads:
+                self.threads[thread.ident] = thread.name
+
+    def save(self, path):
+        """Write the trace as JSON. Returns path or None"""
+        try:
+            with self.lock:
+                metadata = [
+                    {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+                    for tid, name in self.threads.items()
+                ]
+                events = metadata + list(self.events)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+            print(f"✓ Trace written to {path}")
+            return path
+        except Exception as e:
+            print(f"Error saving trace: {str(e)}")
+            return None
+
+
+def trace_span(tracer, name, cat="attendance", args=None):
+    """Span on `tracer`, or a no-op context manager when tracing is off"""
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.span(name, cat, args)
+
+
+def trace_path_for(session_csv):
+    """Trace path next to a session CSV"""
+    base, _ = os.path.splitext(session_csv)
+    return base + "_trace.json"
@@ -1,15 +1,21 @@
 import pyttsx3
+from backend.trace_recorder import trace_span
 
 class TextToSpeech:
     """Handle text-to-speech functionality"""
     
     @staticmethod
-    def speak(text):
-        """Convert text to speech"""
+    def speak(text, tracer=None):
+        """
+        Convert text to speech
+        tracer: optional TraceRecorder; TTS blocks the calling thread, so it is
+        worth seeing on a timeline
+        """
         try:
-            engine = pyttsx3.init()
-            engine.say(text)
-            engine.runAndWait()
+            with trace_span(tracer, "tts", "tts", {"text": text}):
+                engine = pyttsx3.init()
+                engine.say(text)
+                engine.runAndWait()
         except Exception as e:
             print(f"Error in text-to-speech: {str(e)}")
 
@@ -0,0 +1,197 @@
+import multiprocessing
+import os
+import time
+
+import cv2
+
+from backend.face_recognition import FaceRecognizer, MODEL_SUFFIXES
+from backend.attendance_handler import AttendanceHandler
+from backend.attendance_session import AttendanceSession
+from backend.roster_index import RosterIndex
+from backend.keyframe_detector import KeyframeDetector
+
+
+def _process_segment(job):
+    """
+    Worker entry point: run the attendance session logic over one time
+    segment of a video file.
+    Returns: dict with first-seen (timestamp, record) pairs and counters
+    """
+    result = {"records": [], "frames_processed": 0, "error": None}
+    cap = None
+    try:
+        roster_index = RosterIndex(job["student_details_path"])
+        roster_index.refresh()
+
+        face_recognizer = FaceRecognizer(job["haarcascade_path"], job["model_path"], backend=job["recognizer_backend"])
+        if not face_recognizer.load_model(job["subject"], roster_index.expected_for_subject(job["subject"])):
+            result["error"] = "Model not found"
+            return result
+        face_recognizer.detection_scale = job["detection_scale"]
+        attendance_handler = AttendanceHandler(job["attendance_path"], job["student_details_path"])
+
+        detector = None
+        if job["keyframe_interval"] > 1:
+            detector = KeyframeDetector(face_recognizer, job["keyframe_interval"])
+        session = AttendanceSession(face_recognizer, attendance_handler, roster_index, job["subject"],
+                                    detector=detector)
+
+        cap = cv2.VideoCapture(job["video_path"])
+        if not cap.isOpened():
+            result["error"] = "Could not open video"
+            return result
+        cap.set(cv2.CAP_PROP_POS_FRAMES, job["start_frame"])
+
+        fps = job["fps"]
+        frame_index = job["start_frame"]
+        while frame_index < job["end_frame"]:
+            if (frame_index - job["start_frame"]) % job["frame_step"] == 0:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                captured_at = job["recorded_at"] + frame_index / fps
+                session.process_frame(frame, captured_at)
+            elif not cap.grab():
+                # Skipped frames are only grabbed, not decoded
+                break
+            frame_index += 1
+
+        result["frames_processed"] = session.frames_processed
+        for record in session.attendance_records:
+            seen_at = session.first_seen.get(record["Enrollment"])
+            result["records"].append((seen_at, record))
+        return result
+    except Exception as e:
+        result["error"] = str(e)
+        return result
+    finally:
+        if cap is not None:
+            cap.release()
+
+
+class VideoAttendanceProcessor:
+    """
+    Build an attendance session from a recorded lecture video.
+
+    The recording is cut into time segments that are processed in parallel
+    worker processes; per-segment results are merged keeping the earliest
+    sighting of each student.
+    """
+
+    def __init__(self, haarcascade_path, model_path, student_details_path, attendance_path,
+                 recognizer_backend="cv2"):
+        self.haarcascade_path = haarcascade_path
+        self.model_path = model_path
+        self.recognizer_backend = recognizer_backend
+        self.student_details_path = student_details_path
+        self.attendance_path = attendance_path
+        self.last_stats = {}
+
+    def _build_jobs(self, video_path, subject, segment_seconds, sample_fps, recorded_at,
+                    detection_scale, keyframe_interval):
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            return None, 0.0
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        if total_frames <= 0:
+            return None, 0.0
+
+        video_seconds = total_frames / fps
+        if recorded_at is None:
+            # File mtime is when the recording finished
+            recorded_at = os.path.getmtime(video_path) - video_seconds
+
+        frame_step = max(1, int(round(fps / sample_fps))) if sample_fps else 1
+        segment_frames = max(frame_step, int(segment_seconds * fps))
+        jobs = []
+        for start in range(0, total_frames, segment_frames):
+            jobs.append({
+                "video_path": video_path,
+                "start_frame": start,
+                "end_frame": min(total_frames, start + segment_frames),
+                "frame_step": frame_step,
+                "fps": fps,
+                "recorded_at": recorded_at,
+                "subject": subject,
+                "haarcascade_path": self.haarcascade_path,
+                "model_path": self.model_path,
+                "recognizer_backend": self.recognizer_backend,
+                "student_details_path": self.student_details_path,
+                "attendance_path": self.attendance_path,
+                "detection_scale": detection_scale,
+                "keyframe_interval": keyframe_interval,
+            })
+        return jobs, video_seconds
+
+    def process(self, video_path, subject, attendance_handler, workers=None, segment_seconds=300,
+                sample_fps=5, recorded_at=None, detection_scale=1.0, keyframe_interval=1):
+        """
+        Process a video file and save one attendance session for `subject`.
+        sample_fps limits how many frames per second of video are analysed.
+        recorded_at is the epoch time the recording started (defaults to file mtime minus length).
+        Returns: (success, student_count, message)
+        """
+        try:
+            if not os.path.exists(video_path):
+                return False, 0, f"Video not found: {video_path}"
+            # The numpy/pca backends may only have their converted model file
+            model_file = os.path.splitext(self.model_path)[0] + MODEL_SUFFIXES.get(self.recognizer_backend, ".yml")
+            if not os.path.exists(self.model_path) and not os.path.exists(model_file):
+                return False, 0, "Model not found! Train first."
+
+            started = time.time()
+            jobs, video_seconds = self._build_jobs(
+                video_path, subject, segment_seconds, sample_fps, recorded_at,
+                detection_scale, keyframe_interval
+            )
+            if not jobs:
+                return False, 0, "Could not read video"
+
+            workers = max(1, min(workers or (os.cpu_count() or 1), len(jobs)))
+            print(f"Processing {video_seconds:.0f}s of video in {len(jobs)} segments with {workers} workers...")
+            if workers == 1:
+                results = [_process_segment(job) for job in jobs]
+            else:
+                ctx = multiprocessing.get_context("spawn")
+                with ctx.Pool(workers) as pool:
+                    results = pool.map(_process_segment, jobs)
+
+            errors = [r["error"] for r in results if r["error"]]
+            for err in errors:
+                print(f"Warning: segment failed: {err}")
+
+            # Earliest sighting per student across all segments
+            earliest = {}
+            for result in results:
+                for seen_at, record in result["records"]:
+                    key = record["Enrollment"]
+                    if key not in earliest or seen_at < earliest[key][0]:
+                        earliest[key] = (seen_at, record)
+            records = [record for _, record in sorted(earliest.values(), key=lambda item: item[0])]
+
+            wall = time.time() - started
+            self.last_stats = {
+                "video_seconds": round(video_seconds, 2),
+                "wall_seconds": round(wall, 2),
+                "speedup": round(video_seconds / wall, 2) if wall > 0 else 0.0,
+                "segments": len(jobs),
+                "failed_segments": len(errors),
+                "workers": workers,
+                "frames_processed": sum(r["frames_processed"] for r in results),
+                "students_recognized": len(records),
+            }
+            print(f"Video stats: {self.last_stats}")
+
+            if not records:
+                if len(errors) == len(jobs):
+                    return False, 0, f"Error processing video: {errors[0]}"
+                return False, 0, "No attendance recorded"
+
+            filepath, msg = attendance_handler.save_attendance(records, subject)
+            if filepath is None:
+                return False, 0, msg
+            return True, len(records), msg
+        except Exception as e:
+            return False, 0, f"Error processing video: {str(e)}"
@@ -0,0 +1,126 @@
+"""
+Compare the frame rate of headless attendance sessions with GUI sessions.
+
+    python benchmarks/headless_session.py --video lecture.mp4 --frames 300
+    python benchmarks/headless_session.py --frames 300 --size 1280 720
+
+Runs the per-frame path of AttendanceLogic.start_attendance on the same
+frames three times: headless (process_frame only), draw (plus
+draw_detections) and gui (plus cv2.imshow and waitKey(1)). The gui mode
+needs a display and is skipped without one. Without --video, synthetic
+frames are used; they contain no faces, so only detection and the
+drawing of the timer overlay are measured.
+
+Frames are decoded up front, so camera and decoding time are left out.
+Modes are run in turn `--repeats` times and the best run of each is
+reported, since detection time varies more than drawing costs.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.attendance_handler import AttendanceHandler
+from backend.attendance_session import AttendanceSession
+from backend.face_recognition import FaceRecognizer
+from backend.roster_index import RosterIndex
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_frames(video, count, size):
+    if video is None:
+        rng = np.random.default_rng(0)
+        return [cv2.GaussianBlur(rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8), (9, 9), 0)
+                for _ in range(count)]
+    capture = cv2.VideoCapture(video)
+    frames = []
+    while len(frames) < count:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(frame)
+    capture.release()
+    return frames
+
+
+def has_display():
+    return sys.platform in ("win32", "darwin") or bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+def run(mode, frames, face_recognizer, roster_index, attendance_handler, subject):
+    """Returns (frames per second, average draw+display ms per frame)"""
+    session = AttendanceSession(face_recognizer, attendance_handler, roster_index, subject)
+    display_time = 0.0
+    started = time.perf_counter()
+    for frame in frames:
+        # The GUI draws onto the frame; keep the input identical for every mode
+        frame = frame.copy()
+        detections = session.process_frame(frame)
+        if mode == "headless":
+            continue
+        display_started = time.perf_counter()
+        session.draw_detections(frame, detections, 0)
+        if mode == "gui":
+            cv2.imshow("Headless benchmark", frame)
+            cv2.waitKey(1)
+        display_time += time.perf_counter() - display_started
+    elapsed = time.perf_counter() - started
+    if mode == "gui":
+        cv2.destroyAllWindows()
+    return len(frames) / elapsed, display_time / len(frames) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", help="video file to read frames from (default: synthetic frames)")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--size", type=int, nargs=2, default=[1280, 720], metavar=("WIDTH", "HEIGHT"),
+                        help="synthetic frame size")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--subject", default="Benchmark")
+    parser.add_argument("--model-path", default=os.path.join(BASE_DIR, "TrainingImageLabel", "Trainner.yml"))
+    parser.add_argument("--student-details", default=os.path.join(BASE_DIR, "StudentDetails", "studentdetails.csv"))
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames, args.size)
+    if not frames:
+        print("No frames to process")
+        sys.exit(1)
+
+    face_recognizer = FaceRecognizer(os.path.join(BASE_DIR, "haarcascade_frontalface_default.xml"), args.model_path)
+    if not face_recognizer.load_model():
+        print("Without a trained model only detection is measured")
+    roster_index = RosterIndex(args.student_details)
+    roster_index.refresh()
+
+    modes = ["headless", "draw"] + (["gui"] if has_display() else [])
+    with tempfile.TemporaryDirectory() as tmp:
+        # Records of recognized students go to a scratch directory
+        attendance_handler = AttendanceHandler(tmp, args.student_details)
+        # Warm up the cascade and caches so the first mode is not penalized
+        run("headless", frames[:10], face_recognizer, roster_index, attendance_handler, args.subject)
+        results = {}
+        for _ in range(args.repeats):
+            for mode in modes:
+                result = run(mode, frames, face_recognizer, roster_index, attendance_handler, args.subject)
+                if mode not in results or result[0] > results[mode][0]:
+                    results[mode] = result
+
+    height, width = frames[0].shape[:2]
+    print(f"{len(frames)} frames of {width}x{height}")
+    print(f"{'mode':>9} {'fps':>8} {'draw+display ms':>16} {'vs headless':>12}")
+    for mode, (fps, display_ms) in results.items():
+        print(f"{mode:>9} {fps:>8.1f} {display_ms:>16.2f} {fps / results['headless'][0]:>11.0%}")
+    if "gui" not in results:
+        print("gui: skipped, no display")
+
+
+if __name__ == "__main__":
+    main()
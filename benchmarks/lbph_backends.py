@@ -0,0 +1,93 @@
+"""
+Compare the cv2 and numpy LBPH backends on synthetic faces.
+
+    python benchmarks/lbph_backends.py --students 100 1000 10000
+
+Every student gets `--samples` synthetic training crops; predictions are
+timed on batches of `--batch` crops (a crowded frame). The cv2 backend
+predicts crop by crop, the numpy backend the whole batch at once.
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.lbph_numpy import NumpyLBPHRecognizer
+
+
+def synthetic_faces(students, samples, size, seed=0):
+    """Smooth random textures, one base per student plus per-sample noise"""
+    rng = np.random.default_rng(seed)
+    faces, labels, bases = [], [], []
+    for label in range(students):
+        base = cv2.GaussianBlur(rng.integers(0, 256, (size, size), dtype=np.uint8), (7, 7), 0)
+        bases.append(base)
+        for _ in range(samples):
+            faces.append(jitter(base, rng))
+            labels.append(label)
+    return faces, labels, bases
+
+
+def jitter(base, rng, amount=20):
+    noise = rng.integers(-amount, amount, base.shape)
+    return np.clip(base.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+def run(students, samples, batch, rounds, size):
+    faces, labels, bases = synthetic_faces(students, samples, size)
+    rng = np.random.default_rng(1)
+    picks = rng.integers(0, students, batch * rounds)
+    queries = [jitter(bases[i], rng, 30) for i in picks]
+
+    cv_model = cv2.face.LBPHFaceRecognizer_create()
+    cv_model.train(faces, np.array(labels))
+
+    # Imports the histograms and builds the search index, like loading a model
+    np_model = NumpyLBPHRecognizer.from_cv2(cv_model)
+
+    started = time.perf_counter()
+    cv_results = [cv_model.predict(q) for q in queries]
+    cv_predict = time.perf_counter() - started
+
+    started = time.perf_counter()
+    np_results = []
+    for i in range(0, len(queries), batch):
+        np_results.extend(np_model.predict_batch(queries[i:i + batch]))
+    np_predict = time.perf_counter() - started
+
+    agree = sum(a[0] == b[0] for a, b in zip(cv_results, np_results)) / len(queries)
+    max_conf_diff = max(abs(a[1] - b[1]) for a, b in zip(cv_results, np_results))
+    return {
+        "students": students,
+        "histograms": len(faces),
+        "cv2_crops_per_s": len(queries) / cv_predict,
+        "numpy_crops_per_s": len(queries) / np_predict,
+        "speedup": cv_predict / np_predict,
+        "label_agreement": agree,
+        "max_conf_diff": max_conf_diff,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--samples", type=int, default=1, help="training crops per student")
+    parser.add_argument("--batch", type=int, default=8, help="crops predicted together")
+    parser.add_argument("--rounds", type=int, default=4, help="batches timed per size")
+    parser.add_argument("--size", type=int, default=100, help="crop side in pixels")
+    args = parser.parse_args()
+
+    print(f"{'students':>8} {'hists':>7} {'cv2 crops/s':>12} {'numpy crops/s':>14} {'speedup':>8} {'agree':>6} {'max dconf':>10}")
+    for students in args.students:
+        r = run(students, args.samples, args.batch, args.rounds, args.size)
+        print(f"{r['students']:>8} {r['histograms']:>7} {r['cv2_crops_per_s']:>12.1f} {r['numpy_crops_per_s']:>14.1f} "
+              f"{r['speedup']:>7.2f}x {r['label_agreement']:>6.0%} {r['max_conf_diff']:>10.2e}")
+
+
+if __name__ == "__main__":
+    main()
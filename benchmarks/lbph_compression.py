@@ -0,0 +1,94 @@
+"""
+Compare PCA-compressed LBPH models with raw-histogram models.
+
+    python benchmarks/lbph_compression.py --students 300 --samples 20 --dimensions 64 128 256
+    python benchmarks/lbph_compression.py --training-path TrainingImage
+
+Reports model file size, load time, memory held by the model, predict
+latency per batch and agreement with the raw NumpyLBPHRecognizer: same
+label, same accept/reject decision at the threshold, and the median
+confidence difference.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.lbph_numpy import NumpyLBPHRecognizer
+from backend.lbph_compressed import CompressedLBPHRecognizer
+from lbph_pruning import synthetic_split, training_split
+
+
+def model_memory(model):
+    if isinstance(model, CompressedLBPHRecognizer):
+        return model.memory_bytes()
+    inverse, sums = model._search_index()
+    return model.histograms.nbytes + model.labels.nbytes + inverse.nbytes + sums.nbytes
+
+
+def measure(model, path, queries, batch):
+    model.save(path)
+    size = os.path.getsize(path)
+    loaded = type(model)()
+    started = time.perf_counter()
+    loaded.read(path)
+    load_time = time.perf_counter() - started
+
+    results = []
+    latencies = []
+    for i in range(0, len(queries), batch):
+        started = time.perf_counter()
+        results.extend(loaded.predict_batch(queries[i:i + batch]))
+        latencies.append(time.perf_counter() - started)
+    return results, size, load_time, model_memory(loaded), np.median(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=300)
+    parser.add_argument("--samples", type=int, default=20, help="training crops per student")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dimensions", type=int, nargs="+", default=[64, 128, 256])
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--size", type=int, default=100, help="crop side in pixels")
+    parser.add_argument("--threshold", type=float, default=70, help="attendance confidence threshold")
+    parser.add_argument("--training-path", help="use captured training images instead of synthetic faces")
+    args = parser.parse_args()
+
+    if args.training_path:
+        train_faces, train_labels, queries = training_split(args.training_path, args.size)
+    else:
+        train_faces, train_labels, queries = synthetic_split(args.students, args.samples, args.queries, args.size)
+    print(f"{len(set(train_labels))} students, {len(train_faces)} training histograms, {len(queries)} queries")
+
+    print(f"{'model':>8} {'file MB':>8} {'load ms':>8} {'memory MB':>10} {'batch ms':>9} "
+          f"{'label agree':>12} {'decision agree':>15} {'median dconf':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        raw = NumpyLBPHRecognizer()
+        raw.train(train_faces, train_labels)
+        exhaustive, size, load_time, memory, latency = measure(raw, os.path.join(tmp, "raw.npz"), queries, args.batch)
+        print(f"{'raw':>8} {size / 1e6:>8.2f} {load_time * 1000:>8.1f} {memory / 1e6:>10.2f} {latency * 1000:>9.2f}")
+
+        for dimensions in args.dimensions:
+            model = CompressedLBPHRecognizer(dimensions)
+            model.train(train_faces, train_labels)
+            results, size, load_time, memory, latency = measure(
+                model, os.path.join(tmp, f"pca{dimensions}.pca.npz"), queries, args.batch
+            )
+            label_agree = np.mean([a[0] == b[0] for a, b in zip(exhaustive, results)])
+            decision_agree = np.mean([
+                (a[1] < args.threshold) == (b[1] < args.threshold) and (a[1] >= args.threshold or a[0] == b[0])
+                for a, b in zip(exhaustive, results)
+            ])
+            conf_diff = np.median([abs(a[1] - b[1]) for a, b in zip(exhaustive, results)])
+            print(f"{'pca' + str(dimensions):>8} {size / 1e6:>8.2f} {load_time * 1000:>8.1f} {memory / 1e6:>10.2f} "
+                  f"{latency * 1000:>9.2f} {label_agree:>12.1%} {decision_agree:>15.1%} {conf_diff:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
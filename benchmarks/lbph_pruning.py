@@ -0,0 +1,128 @@
+"""
+Measure the two-level (centroid, then top-k students) LBPH search against
+the exhaustive search of NumpyLBPHRecognizer.
+
+    python benchmarks/lbph_pruning.py --students 300 --samples 20 --top-k 1 2 5 10
+    python benchmarks/lbph_pruning.py --training-path TrainingImage
+
+With --training-path the captured training images are used: every fifth
+image of a student is held out as a query. Otherwise synthetic faces are
+generated. For every k the report gives the label agreement with the
+exhaustive search, the share of crops the exhaustive search accepts at the
+attendance threshold that the pruned search accepts with the same label,
+the agreement of the accept/reject decision, throughput and histogram
+comparisons per crop.
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.lbph_numpy import NumpyLBPHRecognizer
+
+
+def vary(base, rng):
+    """A new 'capture' of a face: small shift, lighting change and sensor noise"""
+    dy, dx = rng.integers(-2, 3, 2)
+    image = np.roll(base, (dy, dx), axis=(0, 1)).astype(np.int16)
+    image += rng.integers(-15, 16) + rng.integers(-6, 7, base.shape)
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+
+def synthetic_split(students, samples, queries, size, seed=0):
+    rng = np.random.default_rng(seed)
+    bases = [cv2.GaussianBlur(rng.integers(0, 256, (size, size), dtype=np.uint8), (7, 7), 0)
+             for _ in range(students)]
+    train_faces, train_labels = [], []
+    for label, base in enumerate(bases):
+        for _ in range(samples):
+            train_faces.append(vary(base, rng))
+            train_labels.append(label)
+    # Enrolled students plus a few strangers the model has never seen
+    query_faces = [vary(bases[i], rng) for i in rng.integers(0, students, queries)]
+    for _ in range(max(1, queries // 10)):
+        stranger = cv2.GaussianBlur(rng.integers(0, 256, (size, size), dtype=np.uint8), (7, 7), 0)
+        query_faces.append(vary(stranger, rng))
+    return train_faces, train_labels, query_faces
+
+
+def training_split(training_path, size):
+    from backend.face_recognition import FaceRecognizer
+    faces, labels = FaceRecognizer("", "").get_training_data(training_path)
+    train_faces, train_labels, query_faces = [], [], []
+    seen = {}
+    for face, label in zip(faces, labels):
+        face = cv2.resize(face, (size, size))
+        seen[label] = seen.get(label, 0) + 1
+        if seen[label] % 5 == 0:
+            query_faces.append(face)
+        else:
+            train_faces.append(face)
+            train_labels.append(label)
+    return train_faces, train_labels, query_faces
+
+
+def timed_predict(model, queries, batch, top_k):
+    started = time.perf_counter()
+    results = []
+    for i in range(0, len(queries), batch):
+        results.extend(model.predict_batch(queries[i:i + batch], top_k=top_k))
+    return results, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=300)
+    parser.add_argument("--samples", type=int, default=20, help="training crops per student")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, nargs="+", default=[1, 2, 5, 10, 20])
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--size", type=int, default=100, help="crop side in pixels")
+    parser.add_argument("--threshold", type=float, default=70, help="attendance confidence threshold")
+    parser.add_argument("--training-path", help="use captured training images instead of synthetic faces")
+    args = parser.parse_args()
+
+    if args.training_path:
+        train_faces, train_labels, queries = training_split(args.training_path, args.size)
+    else:
+        train_faces, train_labels, queries = synthetic_split(args.students, args.samples, args.queries, args.size)
+
+    model = NumpyLBPHRecognizer()
+    model.train(train_faces, train_labels)
+    students = len(set(train_labels))
+    print(f"{students} students, {len(train_faces)} training histograms, {len(queries)} queries")
+
+    exhaustive, base_time = timed_predict(model, queries, args.batch, None)
+    accepted = sum(conf < args.threshold for _, conf in exhaustive)
+    print(f"exhaustive: {len(queries) / base_time:.1f} crops/s, {accepted} accepted at < {args.threshold:g}")
+
+    counts = np.bincount(np.unique(train_labels, return_inverse=True)[1])
+    print(f"{'k':>4} {'label agree':>12} {'accepted kept':>14} {'decision agree':>15} {'crops/s':>9} "
+          f"{'speedup':>8} {'comparisons':>12}")
+    for top_k in args.top_k:
+        if top_k >= students:
+            continue
+        model._student_index()  # build outside the timed loop
+        pruned, elapsed = timed_predict(model, queries, args.batch, top_k)
+        label_agree = np.mean([a[0] == b[0] for a, b in zip(exhaustive, pruned)])
+        kept = sum(a[1] < args.threshold and b[1] < args.threshold and a[0] == b[0]
+                   for a, b in zip(exhaustive, pruned))
+        decision_agree = np.mean([
+            (a[1] < args.threshold) == (b[1] < args.threshold) and (a[1] >= args.threshold or a[0] == b[0])
+            for a, b in zip(exhaustive, pruned)
+        ])
+        # Centroids plus the samples of k typical students
+        comparisons = students + top_k * counts.mean()
+        print(f"{top_k:>4} {label_agree:>12.1%} {kept / max(1, accepted):>14.1%} {decision_agree:>15.1%} "
+              f"{len(queries) / elapsed:>9.1f} "
+              f"{base_time / elapsed:>7.2f}x {comparisons:>12.0f}")
+    print(f"exhaustive comparisons per crop: {len(train_faces)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Check that registering and removing students keeps every stored model
+format consistent.
+
+    python benchmarks/model_updates.py
+
+Replays: a numpy session converts Trainner.yml to .npz, a student
+registers (an update segment is added), then another student is
+removed. Every backend must then see the same students.
+
+Then times registering one more student into models of `--students`
+students: update_model only writes a segment, so it should take about
+as long whatever the model size. Loading the model with the segment and
+merging the segment into it (done at startup) are timed too, and the
+loaded model must predict like one trained on every student.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.face_recognition import FaceRecognizer
+from lbph_pruning import synthetic_split
+
+
+def model_labels(path, backend):
+    recognizer = FaceRecognizer("", path, backend)
+    if not recognizer.load_model():
+        return set()
+    return {int(label) for label in np.asarray(recognizer.recognizer.getLabels()).ravel()}
+
+
+def check_stale_conversion(faces, labels):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "Trainner.yml")
+        first = [i for i, label in enumerate(labels) if label in (1, 2)]
+        added = [i for i, label in enumerate(labels) if label == 3]
+        FaceRecognizer("", path).train_model([faces[i] for i in first], [labels[i] for i in first])
+        time.sleep(0.05)
+        # A numpy session converts the .yml
+        model_labels(path, "numpy")
+        time.sleep(0.05)
+        FaceRecognizer("", path).update_model([faces[i] for i in added], [labels[i] for i in added])
+        time.sleep(0.05)
+        FaceRecognizer("", path).remove_labels([2])
+        return {backend: model_labels(path, backend) for backend in ("cv2", "numpy", "pca")}
+
+
+def time_update(students, samples):
+    """Returns (update_model seconds, next load_model seconds, merge_segments seconds)"""
+    faces, labels, queries = synthetic_split(students + 1, samples, 20, 100)
+    enrolled = len(faces) - samples
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "Trainner.yml")
+        FaceRecognizer("", path).train_model(faces[:enrolled], labels[:enrolled])
+        started = time.perf_counter()
+        FaceRecognizer("", path).update_model(faces[enrolled:], labels[enrolled:])
+        update = time.perf_counter() - started
+
+        recognizer = FaceRecognizer("", path)
+        started = time.perf_counter()
+        recognizer.load_model()
+        load = time.perf_counter() - started
+        trained = cv2.face.LBPHFaceRecognizer_create()
+        trained.train(faces, np.array(labels))
+        if [recognizer.predict_face(q)[0] for q in queries] != [trained.predict(q)[0] for q in queries]:
+            print(f"FAILED: the updated model of {students} students predicts differently")
+            sys.exit(1)
+
+        started = time.perf_counter()
+        recognizer.merge_segments(path)
+        return update, load, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, nargs="+", default=[10, 500])
+    parser.add_argument("--samples", type=int, default=10, help="training crops per student")
+    args = parser.parse_args()
+
+    faces, labels, _ = synthetic_split(4, 5, 0, 100)
+    results = check_stale_conversion(faces, labels)
+    for backend, found in results.items():
+        print(f"{backend:>6}: students {sorted(found)}")
+    if any(found != {1, 3} for found in results.values()):
+        print("FAILED: expected students [1, 3] in every backend")
+        sys.exit(1)
+    print("✓ All backends agree")
+
+    timings = {students: time_update(students, args.samples) for students in args.students}
+    print(f"{'students':>9} {'update_model s':>15} {'next load s':>12} {'merge s':>8}")
+    for students, (update, load, merge) in timings.items():
+        print(f"{students:>9} {update:>15.3f} {load:>12.3f} {merge:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
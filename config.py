@@ -11,6 +11,11 @@ STUDENT_DETAILS_PATH = os.path.join(BASE_DIR, "StudentDetails", "studentdetails.
 ATTENDANCE_PATH = os.path.join(BASE_DIR, "Attendance")
 UI_IMAGE_PATH = os.path.join(BASE_DIR, "UI_Image")
 
+# Face recognizer used by registration and attendance: "cv2" (OpenCV LBPH),
+# "numpy" (same results and batched prediction, but keeps a second copy of
+# the model in memory) or "pca" (compressed models), see FaceRecognizer
+RECOGNIZER_BACKEND = "cv2"
+
 # Create directories if they don't exist
 os.makedirs(os.path.dirname(TRAIN_IMAGE_PATH), exist_ok=True)
 os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
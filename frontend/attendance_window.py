@@ -2,6 +2,11 @@ import tkinter as tk
 from tkinter import *
 from tkinter import messagebox
 import os
+import queue
+import threading
+import cv2
+from PIL import Image, ImageTk
+from config import RECOGNIZER_BACKEND
 from backend.attendance_logic import AttendanceLogic
 from backend.utils import TextToSpeech
 from frontend.theme import (
@@ -21,10 +26,18 @@ class AttendanceWindow:
         self.model_path = model_path
         self.main_window = main_window
         
+        # Background session state
+        self.session_thread = None
+        self.stop_event = threading.Event()
+        self.frame_queue = queue.Queue(maxsize=1)   # newest preview frame only
+        self.event_queue = queue.Queue()            # recognitions and session result
+        self.preview_photo = None
+        self.preview_size = (480, 360)
+        
         # Initialize logic handler
         self.logic = AttendanceLogic(
             base_dir, haarcascade_path, train_path, 
-            student_details_path, model_path
+            student_details_path, model_path, recognizer_backend=RECOGNIZER_BACKEND
         )
         
         self.window = tk.Toplevel()
@@ -46,6 +59,8 @@ class AttendanceWindow:
     
     def go_back(self):
         """Go back to main window"""
+        # Let a running session finish and save in the background
+        self.stop_event.set()
         self.window.destroy()
         if self.main_window:
             self.main_window.window.deiconify()
@@ -184,6 +199,38 @@ class AttendanceWindow:
         )
         stop_btn.pack(side=LEFT)
         self._add_button_hover(stop_btn, DANGER_BG, darken=True)
+        
+        # Live preview and recognized students
+        live = tk.Frame(card, bg=CARD_BG)
+        live.pack(fill=X, pady=(25, 0))
+        
+        # Blank placeholder; frames are pasted into this same PhotoImage
+        self.preview_label = tk.Label(
+            live,
+            image=self._blank_preview(),
+            bg=INPUT_BG,
+            highlightthickness=1,
+            highlightbackground=BORDER_COLOR,
+        )
+        self.preview_label.pack(side=LEFT, padx=(0, 20))
+        
+        recognized = tk.Frame(live, bg=CARD_BG)
+        recognized.pack(side=LEFT, fill=Y)
+        tk.Label(recognized, text="Recognized", bg=CARD_BG, fg=ACCENT_FG, font=("Segoe UI", 12, "bold")).pack(anchor=W, pady=(0, 8))
+        self.recognized_list = tk.Listbox(
+            recognized,
+            bg=INPUT_BG,
+            fg=PRIMARY_FG,
+            font=("Segoe UI", 11),
+            width=30,
+            height=14,
+            bd=0,
+            highlightthickness=1,
+            highlightbackground=BORDER_COLOR,
+            selectbackground=PRIMARY_FG,
+            selectforeground=PRIMARY_BG,
+        )
+        self.recognized_list.pack(fill=Y, expand=True)
 
         # Seed default subjects and populate dropdown
         self.seed_and_load_subjects()
@@ -198,17 +245,96 @@ class AttendanceWindow:
             TextToSpeech.speak("Please enter subject name")
             return
         
+        if self.session_thread is not None and self.session_thread.is_alive():
+            self.update_message("Attendance is already running", "yellow", "black")
+            return
+        
         # Show chosen subject in status for clarity
-        self.update_message(f"Starting for {subject}...", CARD_BG, PRIMARY_FG)
-        # Call logic handler
-        success, student_count, message = self.logic.start_attendance(subject)
+        self.update_message(f"Taking attendance for {subject}...", CARD_BG, PRIMARY_FG)
+        self.recognized_list.delete(0, END)
+        self.start_btn.configure(state=DISABLED)
+        self.stop_event.clear()
         
+        # Run the session on a worker; results come back through the queues
+        self.session_thread = threading.Thread(
+            target=self._run_session, args=(subject,), name="AttendanceSession", daemon=True
+        )
+        self.session_thread.start()
+        self.window.after(30, self._poll_session)
+    
+    def _run_session(self, subject):
+        """Worker thread: run a headless session and post the result"""
+        try:
+            result = self.logic.start_attendance(
+                subject,
+                headless=True,
+                stop_event=self.stop_event,
+                on_frame=self._queue_frame,
+                on_recognized=lambda record: self.event_queue.put(("recognized", record)),
+            )
+        except Exception as e:
+            result = (False, 0, f"Error: {str(e)}")
+        self.event_queue.put(("done", result))
+    
+    def _queue_frame(self, frame):
+        """Worker thread: keep only the newest preview frame"""
+        preview = cv2.resize(frame, self.preview_size, interpolation=cv2.INTER_AREA)
+        preview = cv2.cvtColor(preview, cv2.COLOR_BGR2RGB)
+        try:
+            self.frame_queue.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            self.frame_queue.put_nowait(preview)
+        except queue.Full:
+            pass
+    
+    def _poll_session(self):
+        """Tk thread: render the latest preview and handle session events"""
+        try:
+            if not self.window.winfo_exists():
+                return
+        except tk.TclError:
+            return
+        
+        try:
+            frame = self.frame_queue.get_nowait()
+            image = Image.fromarray(frame)
+            if self.preview_photo is None:
+                self.preview_photo = ImageTk.PhotoImage(image)
+                self.preview_label.configure(image=self.preview_photo)
+            else:
+                # Reuse the same PhotoImage instead of allocating one per frame
+                self.preview_photo.paste(image)
+        except queue.Empty:
+            pass
+        
+        done = None
+        while True:
+            try:
+                kind, payload = self.event_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "recognized":
+                self.recognized_list.insert(END, f"{payload['Time']}  {payload['Enrollment']} - {payload['Name']}")
+                self.recognized_list.see(END)
+            elif kind == "done":
+                done = payload
+        
+        if done is not None:
+            self._on_session_done(*done)
+        else:
+            self.window.after(30, self._poll_session)
+    
+    def _on_session_done(self, success, student_count, message):
+        """Tk thread: show the final session result"""
+        self.start_btn.configure(state=NORMAL)
         if success:
             self.update_message(f"{message} - {student_count} students", "green", "black")
-            TextToSpeech.speak(f"{message}. {student_count} students marked present.")
+            self.logic.announce(f"{message}. {student_count} students marked present.")
         else:
             self.update_message(message, "red", "white")
-            TextToSpeech.speak(message)
+            self.logic.announce(message)
 
     def seed_and_load_subjects(self):
         """Seed default subjects if missing and load subjects into dropdown"""
@@ -273,11 +399,21 @@ class AttendanceWindow:
         self.message.configure(text=text, bg=bg_color, fg=fg_color)
     
     def stop_attendance(self):
-        """Stop attendance and close window"""
+        """Stop attendance; closes the window when no session is running"""
+        if self.session_thread is not None and self.session_thread.is_alive():
+            # The worker saves what was recognized and posts the result
+            self.stop_event.set()
+            self.update_message("Stopping attendance...", "yellow", "black")
+            return
         self.update_message("Attendance stopped", "yellow", "black")
         TextToSpeech.speak("Attendance stopped")
         self.window.destroy()
 
+    def _blank_preview(self):
+        """Placeholder image so the preview label is sized in pixels"""
+        self.preview_photo = ImageTk.PhotoImage(Image.new("RGB", self.preview_size, INPUT_BG))
+        return self.preview_photo
+
     def _add_button_hover(self, btn, base_bg, darken=False):
         try:
             def on_enter(e):
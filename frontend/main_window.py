@@ -10,8 +10,13 @@ from frontend.view_attendance_window import ViewAttendanceWindow
 from frontend.manage_subjects_window import ManageSubjectsWindow
 from frontend.view_students_window import ViewStudentsWindow
 from backend.student_manager import StudentManager
+from backend.attendance_handler import AttendanceHandler
 from backend.utils import TextToSpeech
+from backend.model_cache import MODEL_CACHE
+from backend.face_recognition import FaceRecognizer, MODEL_SUFFIXES
+from config import RECOGNIZER_BACKEND
 import shutil
+import threading
 from tkinter import messagebox
 from frontend.theme import (
     PRIMARY_BG, PRIMARY_FG, ACCENT_BG, ACCENT_FG, DANGER_BG,
@@ -46,9 +51,25 @@ class MainWindow:
         self.haarcascade_path = os.path.join(base_dir, "haarcascade_frontalface_default.xml")
         
         self.student_manager = StudentManager(self.student_details_path)
+        # Save sessions that were interrupted by a crash
+        AttendanceHandler(self.attendance_path, self.student_details_path).recover_journals()
+        # Parse the model and cascade in the background so the first session starts fast
+        threading.Thread(target=self._warm_model_cache, name="ModelCacheWarmup", daemon=True).start()
         self.setup_ui()
         self.update_time()
     
+    def _warm_model_cache(self):
+        """Load the global model and cascade into the process-wide cache"""
+        try:
+            face_recognizer = FaceRecognizer(self.haarcascade_path, self.model_path, backend=RECOGNIZER_BACKEND)
+            # Fold the registrations since the last start into the model files here,
+            # off the UI thread, so registering never has to rewrite them
+            face_recognizer.merge_all_segments()
+            # Loads the configured backend's model, converting the .yml if needed
+            face_recognizer.load_model()
+        except Exception as e:
+            print(f"Error preloading model: {str(e)}")
+    
     def setup_ui(self):
         """Setup main window UI - Sharp Modern Design"""
         # Apply ttk styles for a consistent theme
@@ -322,7 +343,8 @@ class MainWindow:
         self.window.withdraw()
         
         def open_window():
-            ViewStudentsWindow(self.base_dir, self.student_details_path, self.train_path, main_window=self)
+            ViewStudentsWindow(self.base_dir, self.student_details_path, self.train_path, main_window=self,
+                               model_path=self.model_path)
         
         show_loading(duration_ms=500, callback=open_window)
     
@@ -342,9 +364,17 @@ class MainWindow:
                 shutil.rmtree(self.train_path)
                 os.makedirs(self.train_path, exist_ok=True)
             
-            # Delete training model
-            if os.path.exists(self.model_path):
-                os.remove(self.model_path)
+            # Delete training model, in every backend's format
+            base = os.path.splitext(self.model_path)[0]
+            for model_file in [self.model_path] + [base + suffix for suffix in MODEL_SUFFIXES.values()]:
+                if os.path.exists(model_file):
+                    os.remove(model_file)
+            # its pending update segments, and the per-subject shards, which
+            # hold the same students' faces
+            for model_dir in (base + ".segments", os.path.join(os.path.dirname(self.model_path), "shards")):
+                if os.path.exists(model_dir):
+                    shutil.rmtree(model_dir)
+            MODEL_CACHE.invalidate()
             
             # Reset student details
             self.student_manager.reset_all_students()
@@ -2,9 +2,11 @@ import tkinter as tk
 from tkinter import *
 from tkinter import ttk
 from tkinter import filedialog
+from config import RECOGNIZER_BACKEND
 from backend.face_recognition import FaceRecognizer
 from backend.student_manager import StudentManager
 from backend.attendance_handler import AttendanceHandler
+from backend.roster_index import RosterIndex
 from backend.utils import TextToSpeech, validate_enrollment_number, validate_name
 from frontend.theme import (
     PRIMARY_BG, PRIMARY_FG, ACCENT_BG, ACCENT_FG, CARD_BG,
@@ -26,9 +28,10 @@ class RegisterWindow:
         self.attendance_path = os.path.join(base_dir, "Attendance")
         self.main_window = main_window
         
-        self.face_recognizer = FaceRecognizer(haarcascade_path, model_path)
+        self.face_recognizer = FaceRecognizer(haarcascade_path, model_path, backend=RECOGNIZER_BACKEND)
         self.student_manager = StudentManager(student_details_path)
         self.attendance_handler = AttendanceHandler(self.attendance_path, student_details_path)
+        self.roster_index = RosterIndex(student_details_path)
         
         # Selected subjects list
         self.selected_subjects = []
@@ -413,14 +416,19 @@ class RegisterWindow:
             if not id_photo_ok:
                 self.message.configure(text=f"Warning: {id_photo_msg}", bg="#f59e0b", fg="white")
 
-            # Auto-train immediately after successful capture & add
+            # Add only the new student's images to the model; full retraining
+            # stays with the Train Image button
             try:
-                faces, ids = self.face_recognizer.get_training_data(self.train_path)
+                faces, ids = self.face_recognizer.get_training_data(self.train_path, enrollment)
                 if len(faces) == 0:
                     self.message.configure(text="No training images found!", bg="red", fg="white")
                     TextToSpeech.speak("No training images found")
                     return
-                success = self.face_recognizer.train_model(faces, ids)
+                success = self.face_recognizer.update_model(faces, ids, self.selected_subjects)
+                if not success:
+                    # No model yet (or it could not be updated): train from every student
+                    faces, ids = self.face_recognizer.get_training_data(self.train_path)
+                    success = self.face_recognizer.train_model(faces, ids, self._subject_labels())
                 if success:
                     self.message.configure(text="Training completed successfully!", bg="green", fg="white")
                     TextToSpeech.speak("Training completed successfully")
@@ -444,7 +452,7 @@ class RegisterWindow:
                 TextToSpeech.speak("No training images found")
                 return
             
-            success = self.face_recognizer.train_model(faces, ids)
+            success = self.face_recognizer.train_model(faces, ids, self._subject_labels())
             
             if success:
                 self.message.configure(text="Training completed successfully!", bg="green", fg="white")
@@ -464,6 +472,14 @@ class RegisterWindow:
             self.message.configure(text=f"Error: {str(e)}", bg="red", fg="white")
             TextToSpeech.speak(f"Error: {str(e)}")
 
+    def _subject_labels(self):
+        """Enrolled labels per subject, used to train per-subject model shards"""
+        try:
+            self.roster_index.refresh()
+            return self.roster_index.labels_by_subject()
+        except Exception:
+            return None
+
     def _add_button_hover(self, btn, base_bg, darken=False):
         try:
             delta = -20 if darken else 20
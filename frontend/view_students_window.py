@@ -2,11 +2,13 @@ import tkinter as tk
 from tkinter import *
 from tkinter import ttk, messagebox
 import os
+import queue
+import threading
 import pandas as pd
 from PIL import ImageTk, Image
-import shutil
 import datetime
 
+from backend.face_recognition import FaceRecognizer
 from frontend.theme import (
     PRIMARY_BG, PRIMARY_FG, ACCENT_BG, ACCENT_FG, DANGER_BG,
     SUCCESS_BG, INFO_BG, CARD_BG, INPUT_BG, INPUT_FG, BORDER_COLOR, HIGHLIGHT,
@@ -16,11 +18,15 @@ from frontend.theme import (
 
 
 class ViewStudentsWindow:
-    def __init__(self, base_dir, student_details_path, train_path, main_window=None):
+    def __init__(self, base_dir, student_details_path, train_path, main_window=None, model_path=None):
         self.base_dir = base_dir
         self.student_details_path = student_details_path
         self.train_path = train_path
+        self.model_path = model_path or os.path.join(base_dir, "TrainingImageLabel", "Trainner.yml")
         self.main_window = main_window
+        # Removal runs on a worker thread; its result comes back through this queue
+        self.remove_thread = None
+        self.remove_queue = queue.Queue()
         
         self.window = tk.Toplevel()
         self.window.title(f"{APP_BRAND} - Enrolled Students")
@@ -168,7 +174,7 @@ class ViewStudentsWindow:
         btn_row = tk.Frame(search_frame, bg=PRIMARY_BG)
         btn_row.pack(side=RIGHT)
         
-        remove_btn = tk.Button(
+        remove_btn = self.remove_btn = tk.Button(
             btn_row,
             text="🗑️ REMOVE",
             command=self.remove_selected_student,
@@ -493,28 +499,56 @@ class ViewStudentsWindow:
             
             confirm = messagebox.askyesno(
                 "Remove Student",
-                f"⚠️ Remove '{student_name}' ({enrollment_id})?\nThis will also delete their training images.",
+                f"⚠️ Remove '{student_name}' ({enrollment_id})?\nThis will also delete their training images, ID photo and face model data.",
             )
             if not confirm:
                 return
             
-            ok, msg = self.student_manager.remove_student(enrollment_id)
-            if not ok:
-                messagebox.showerror("Remove Failed", msg or "Unable to remove student.")
-                return
-            
-            student_train_dir = os.path.join(self.train_path, enrollment_id)
-            if os.path.isdir(student_train_dir):
-                try:
-                    shutil.rmtree(student_train_dir)
-                except Exception as e:
-                    messagebox.showwarning("Images Not Fully Removed", f"Removed record but failed to delete images: {e}")
-            
-            self.load_students_list()
-            messagebox.showinfo("Removed", f"Student {enrollment_id} removed successfully.")
+            # Rewriting every model file takes a while; keep the window responsive
+            self.remove_btn.configure(state=DISABLED)
+            self.remove_thread = threading.Thread(
+                target=self._run_remove, args=(enrollment_id,), name="RemoveStudent", daemon=True
+            )
+            self.remove_thread.start()
+            self.window.after(100, self._poll_remove, enrollment_id)
         except Exception as e:
             messagebox.showerror("Error", f"Unexpected error: {e}")
     
+    def _run_remove(self, enrollment_id):
+        """Worker thread: remove the student and their model samples"""
+        try:
+            face_recognizer = FaceRecognizer(
+                os.path.join(self.base_dir, "haarcascade_frontalface_default.xml"), self.model_path
+            )
+            result = self.student_manager.remove_student(enrollment_id, self.train_path, face_recognizer)
+        except Exception as e:
+            result = (False, f"Unexpected error: {e}", [])
+        self.remove_queue.put(result)
+    
+    def _poll_remove(self, enrollment_id):
+        """Tk thread: wait for the removal and report it"""
+        try:
+            if not self.window.winfo_exists():
+                return
+        except tk.TclError:
+            return
+        try:
+            ok, msg, warnings = self.remove_queue.get_nowait()
+        except queue.Empty:
+            self.window.after(100, self._poll_remove, enrollment_id)
+            return
+        
+        self.remove_btn.configure(state=NORMAL)
+        if not ok:
+            messagebox.showerror("Remove Failed", msg or "Unable to remove student.")
+            return
+        if warnings:
+            messagebox.showwarning("Not Fully Removed", "\n".join(warnings))
+        
+        # Reloading drops the thumbnail caches, including the removed student's
+        self.load_students_list()
+        messagebox.showinfo("Removed", f"Student {enrollment_id} removed successfully.")
+    
     def _add_button_hover(self, btn, base_bg, darken=False):
         try:
             def on_enter(e):